@@ -1,10 +1,19 @@
 import os
-import psycopg2
-from fastapi import FastAPI, HTTPException, Response
+import uuid
+import asyncio
+import hashlib
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from typing import List, Dict, Optional, Any
-from datetime import datetime
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Dict, Literal, Optional, Any, Set, Union
+from datetime import datetime, timedelta
+from pathlib import Path
 from pydantic import BaseModel
+from starlette.concurrency import run_in_threadpool
+from psycopg import AsyncConnection
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool, PoolTimeout
 import sys
 from loguru import logger
 import json
@@ -31,7 +40,220 @@ DB_PASSWORD = os.getenv(
     os.getenv("PUSHER_DB_PASSWORD", os.getenv("POSTGRES_PASSWORD", "postgres")),
 )
 
-app = FastAPI()
+# Connection pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv("API_DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("API_DB_POOL_MAX_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("API_DB_POOL_TIMEOUT", "5"))
+
+# Pagination configuration for GET /images
+LIST_DEFAULT_LIMIT = int(os.getenv("API_LIST_DEFAULT_LIMIT", "100"))
+LIST_MAX_LIMIT = int(os.getenv("API_LIST_MAX_LIMIT", "1000"))
+
+# Change feed configuration for GET /images?since=
+# Deletions are remembered in image_tombstones for this long
+TOMBSTONE_RETENTION = timedelta(
+    seconds=int(os.getenv("API_TOMBSTONE_RETENTION_SECONDS", "86400"))
+)
+# Window re-read on every delta to cover writers that commit late
+CHANGES_OVERLAP = timedelta(seconds=int(os.getenv("API_CHANGES_OVERLAP_SECONDS", "5")))
+
+# Image download (GET /images/{id})
+# Bodies above this size are streamed from the database in chunks of this size
+IMAGE_CHUNK_SIZE = int(os.getenv("API_IMAGE_CHUNK_SIZE", str(256 * 1024)))
+# Browser/CDN cache lifetime for processed (final) images, in seconds
+IMAGE_CACHE_MAX_AGE = int(os.getenv("API_IMAGE_CACHE_MAX_AGE", "86400"))
+
+# Job progress push (GET /images/events)
+# Postgres NOTIFY channel the scheduler publishes job progress on
+PROGRESS_CHANNEL = "image_progress"
+# Events buffered per client; slow clients drop their oldest events
+EVENTS_QUEUE_SIZE = int(os.getenv("API_EVENTS_QUEUE_SIZE", "100"))
+EVENTS_KEEPALIVE = float(os.getenv("API_EVENTS_KEEPALIVE_SECONDS", "15"))
+
+# Job state filters, expressed against the job JSONB written by the scheduler
+JOB_STATE_FILTERS = {
+    "pending": "job IS NULL",
+    "acquired": "job->>'acquired' = 'true'",
+    "completed": "job->>'completed' = 'true'",
+    "failed": "job->>'failed' = 'true'",
+}
+
+# Blob store configuration (shared by pusher, scheduler and API)
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "./blobs")
+BLOB_STORE_S3_BUCKET = os.getenv("BLOB_STORE_S3_BUCKET", "imagomortis")
+BLOB_STORE_S3_ENDPOINT = os.getenv("BLOB_STORE_S3_ENDPOINT") or None
+
+DB_CONNINFO = make_conninfo(
+    host=DB_HOST, port=DB_PORT, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD
+)
+
+# Shared async connection pool, opened/closed by the application lifespan
+db_pool = AsyncConnectionPool(
+    DB_CONNINFO,
+    min_size=DB_POOL_MIN_SIZE,
+    max_size=DB_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    open=False,
+)
+
+
+class LocalBlobStore:
+    """Content-addressed blobs on a local (or PVC-mounted) filesystem."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def size(self, key: str) -> int:
+        return self._path(key).stat().st_size
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+
+class S3BlobStore:
+    """Content-addressed blobs in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(self, bucket: str, endpoint_url: str = None):
+        # Only needed for this backend; credentials come from the AWS_* env vars
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def size(self, key: str) -> int:
+        """Raises FileNotFoundError, like the local store, for a missing blob."""
+        try:
+            head = self.client.head_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey"):
+                raise FileNotFoundError(key)
+            raise
+        return head["ContentLength"]
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes={start}-{start + length - 1}"
+        )
+        return response["Body"].read()
+
+
+def get_blob_store():
+    """Build the blob store selected by BLOB_STORE_BACKEND."""
+    if BLOB_STORE_BACKEND == "s3":
+        return S3BlobStore(BLOB_STORE_S3_BUCKET, BLOB_STORE_S3_ENDPOINT)
+    return LocalBlobStore(BLOB_STORE_PATH)
+
+
+# Blob store calls are blocking and go through the thread pool
+blob_store = get_blob_store()
+
+
+class ProgressBroadcaster:
+    """
+    Fan out job progress notifications to Server-Sent Events clients.
+    A single LISTEN connection per API process feeds every subscriber, so the
+    number of connected browsers adds no load on Postgres.
+    """
+
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=EVENTS_QUEUE_SIZE)
+        self.subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self.subscribers.discard(queue)
+
+    def publish(self, payload: str):
+        for queue in self.subscribers:
+            if queue.full():
+                # Progress events supersede each other; drop the oldest
+                queue.get_nowait()
+            queue.put_nowait(payload)
+
+    async def run(self):
+        """Listen for notifications forever, reconnecting with backoff."""
+        retry_delay = 1
+        while True:
+            try:
+                async with await AsyncConnection.connect(
+                    DB_CONNINFO, autocommit=True
+                ) as conn:
+                    await conn.execute(f"LISTEN {PROGRESS_CHANNEL}")
+                    logger.info("Listening for job progress", channel=PROGRESS_CHANNEL)
+                    retry_delay = 1
+                    async for notify in conn.notifies():
+                        self.publish(notify.payload)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Progress listener disconnected: {str(e)}")
+            await asyncio.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 30)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+
+progress_broadcaster = ProgressBroadcaster()
+
+
+async def ensure_indexes():
+    """Create the indexes backing the list endpoint (best effort)."""
+    try:
+        # CREATE INDEX CONCURRENTLY can't run inside a transaction block, so use a
+        # dedicated autocommit connection instead of a pooled one.
+        async with await AsyncConnection.connect(DB_CONNINFO, autocommit=True) as conn:
+            await conn.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS images_created_at_id_idx "
+                "ON images (created_at DESC, id)"
+            )
+        logger.info("Database indexes verified")
+    except Exception as e:
+        # The images table is owned by the pusher and may not exist yet
+        logger.warning(f"Failed to ensure database indexes: {str(e)}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Open the database pool on startup and drain it on shutdown."""
+    logger.info(
+        "Opening database pool",
+        min_size=DB_POOL_MIN_SIZE,
+        max_size=DB_POOL_MAX_SIZE,
+        timeout=DB_POOL_TIMEOUT,
+    )
+    # Don't block startup on the database: connections are established in the
+    # background and requests wait (up to DB_POOL_TIMEOUT) for one to be available.
+    await db_pool.open(wait=False)
+    await ensure_indexes()
+    progress_broadcaster.start()
+    try:
+        yield
+    finally:
+        await progress_broadcaster.stop()
+        await db_pool.close()
+        logger.info("Database pool closed")
+
+
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -41,6 +263,8 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # Allows all methods
     allow_headers=["*"],  # Allows all headers
+    # Pagination cursor and change token for GET /images
+    expose_headers=["X-Next-Cursor", "X-Change-Token", "ETag", "Content-Range"],
 )
 
 
@@ -52,63 +276,393 @@ class Image(BaseModel):
     job: Optional[Dict[str, Any]] = None
 
 
-def get_db_connection():
-    """Establish a connection to the PostgreSQL database."""
-    return psycopg2.connect(
-        host=DB_HOST, port=DB_PORT, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD
+class ImageChanges(BaseModel):
+    token: str
+    changed: List[Image]
+    deleted: List[str]
+
+
+def encode_cursor(created_at: datetime, image_id) -> str:
+    """Build the opaque `after` cursor for the row a page ended on."""
+    return f"{created_at.isoformat()},{image_id}"
+
+
+def decode_cursor(cursor: str):
+    """Parse an `after` cursor into (created_at, id), raising 400 if malformed."""
+    try:
+        created_at, image_id = cursor.rsplit(",", 1)
+        return datetime.fromisoformat(created_at), uuid.UUID(image_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def prune_tombstones(conn):
+    """Forget deletions older than the change-feed retention window."""
+    await conn.execute(
+        "DELETE FROM image_tombstones WHERE deleted_at < LOCALTIMESTAMP - %s",
+        (TOMBSTONE_RETENTION,),
     )
 
 
-@app.get("/images", response_model=List[Image])
-async def get_images():
-    """List all images stored in the database."""
-    logger.info("Endpoint called: GET /images")
+def pool_exhausted(e: PoolTimeout) -> HTTPException:
+    """Map a pool acquire timeout to a retryable 503."""
+    logger.warning(f"Database pool exhausted: {str(e)}", pool=db_pool.get_stats())
+    return HTTPException(
+        status_code=503,
+        detail="Database busy, retry later",
+        headers={"Retry-After": "1"},
+    )
+
+
+# Duplicate uploads are stored as aliases of the image with the same content;
+# takes the requested id twice as parameters
+RESOLVE_ALIAS = "COALESCE((SELECT image_id FROM image_aliases WHERE id = %s), %s)"
+
+
+def row_to_image(row) -> Dict[str, Any]:
+    """Convert an (id, created_at, image_resolution, size, job) row to the API shape."""
+    return {
+        "id": str(row[0]),
+        "created_at": row[1].isoformat() if row[1] else None,
+        "resolution": row[2],
+        "size": str(row[3]),
+        "job": row[4],
+    }
+
+
+def list_etag(version, *params) -> str:
+    """
+    Strong ETag for a list page.
+    The version is (max(images.updated_at), max(image_tombstones.deleted_at), now).
+    While the latest write is still inside the overlap window a transaction that
+    started earlier may not have committed yet, so the current time is mixed in to
+    keep the tag from being reused until the table has settled.
+    """
+    max_updated_at, max_deleted_at, now = version
+    parts = [str(max_updated_at), str(max_deleted_at), *map(str, params)]
+    latest = max(filter(None, [max_updated_at, max_deleted_at]), default=None)
+    if latest is not None and now - latest < CHANGES_OVERLAP:
+        parts.append(now.isoformat())
+    return '"' + hashlib.sha1("|".join(parts).encode()).hexdigest() + '"'
+
+
+async def get_image_changes(since: str):
+    """Return the images changed and the ids deleted after the `since` token."""
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute(
-            "SELECT id, created_at, image_resolution, size, job FROM images ORDER BY created_at DESC"
+        since_at = datetime.fromisoformat(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid change token")
+    async with db_pool.connection() as conn:
+        cur = await conn.execute("SELECT LOCALTIMESTAMP")
+        (now,) = await cur.fetchone()
+        if now - since_at > TOMBSTONE_RETENTION:
+            # Deletions older than the retention window are gone: force a full reload
+            raise HTTPException(
+                status_code=410, detail="Change token expired, reload the full list"
+            )
+        # Re-read a small overlap so rows committed late by concurrent writers are
+        # not missed; clients apply changes by id, so duplicates are harmless.
+        since_at -= CHANGES_OVERLAP
+        cur = await conn.execute(
+            """
+            SELECT id, created_at, image_resolution, size, job FROM images
+            WHERE updated_at > %s
+            ORDER BY updated_at
+            """,
+            (since_at,),
+        )
+        changed = [row_to_image(row) for row in await cur.fetchall()]
+        cur = await conn.execute(
+            "SELECT id FROM image_tombstones WHERE deleted_at > %s", (since_at,)
         )
-        rows = cur.fetchall()
-        cur.close()
-        conn.close()
-        # Return list of dicts with id and created_at
-        images = [
-            {
-                "id": str(row[0]),
-                "created_at": row[1].isoformat() if row[1] else None,
-                "resolution": row[2],
-                "size": str(row[3]),
-                "job": row[4],
+        deleted = [str(row[0]) for row in await cur.fetchall()]
+    logger.info(
+        f"Retrieved {len(changed)} changed and {len(deleted)} deleted images",
+        since=since,
+    )
+    return JSONResponse(
+        content={"token": now.isoformat(), "changed": changed, "deleted": deleted},
+        headers={"Cache-Control": "no-store"},
+    )
+
+
+@app.get("/images", response_model=Union[List[Image], ImageChanges])
+async def get_images(
+    request: Request,
+    limit: int = Query(LIST_DEFAULT_LIMIT, ge=1, le=LIST_MAX_LIMIT),
+    after: Optional[str] = Query(
+        None, description="Cursor `<created_at>,<id>` from the X-Next-Cursor header"
+    ),
+    state: Optional[Literal["pending", "acquired", "completed", "failed"]] = None,
+    since: Optional[str] = Query(
+        None, description="Change token from X-Change-Token or a previous delta"
+    ),
+):
+    """
+    List images, newest first, one page at a time.
+    Pages are keyset-paginated on (created_at DESC, id): the cursor for the next page
+    is returned in the X-Next-Cursor header and omitted on the last page.
+    With `since`, return only the images changed and deleted after that token instead.
+    """
+    logger.info(
+        "Endpoint called: GET /images",
+        limit=limit,
+        after=after,
+        state=state,
+        since=since,
+    )
+    try:
+        if since:
+            return await get_image_changes(since)
+
+        conditions = []
+        params: List[Any] = []
+        if after:
+            cursor_created_at, cursor_id = decode_cursor(after)
+            # The leading `created_at <= %s` gives the planner an index range bound
+            conditions.append("created_at <= %s AND (created_at < %s OR id > %s)")
+            params.extend([cursor_created_at, cursor_created_at, cursor_id])
+        if state:
+            conditions.append(JOB_STATE_FILTERS[state])
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        async with db_pool.connection() as conn:
+            # Both aggregates are answered from the updated_at/deleted_at indexes
+            cur = await conn.execute(
+                """
+                SELECT
+                    (SELECT max(updated_at) FROM images),
+                    (SELECT max(deleted_at) FROM image_tombstones),
+                    LOCALTIMESTAMP
+                """
+            )
+            version = await cur.fetchone()
+            etag = list_etag(version, limit, after, state)
+            headers = {
+                "ETag": etag,
+                "Cache-Control": "no-cache",
+                "X-Change-Token": version[2].isoformat(),
             }
-            for row in rows
-        ]
+            if etag in request.headers.get("if-none-match", ""):
+                logger.info("Image list not modified", etag=etag)
+                return Response(status_code=304, headers=headers)
+
+            # Fetch one extra row to know whether there is a next page
+            cur = await conn.execute(
+                f"""
+                SELECT id, created_at, image_resolution, size, job FROM images
+                {where}
+                ORDER BY created_at DESC, id
+                LIMIT %s
+                """,
+                (*params, limit + 1),
+            )
+            rows = await cur.fetchall()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+        images = [row_to_image(row) for row in rows]
         logger.info(f"Retrieved {len(images)} images")
-        return images
+        if has_more:
+            headers["X-Next-Cursor"] = encode_cursor(rows[-1][1], rows[-1][0])
+        # Rows are already in the response shape; skip per-row model validation
+        return JSONResponse(content=images, headers=headers)
+    except HTTPException:
+        raise
+    except PoolTimeout as e:
+        raise pool_exhausted(e)
     except Exception as e:
         logger.error(f"Error retrieving images: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/images/events")
+async def image_events():
+    """
+    Stream job progress as Server-Sent Events.
+    Each event's data is the JSON published by the scheduler, e.g.
+    {"id": ..., "job_id": ..., "state": "acquired", "progress": {"circles": 40.0}}.
+    """
+    logger.info("Endpoint called: GET /images/events")
+    queue = progress_broadcaster.subscribe()
+
+    async def stream():
+        try:
+            yield "retry: 2000\n\n"
+            while True:
+                try:
+                    payload = await asyncio.wait_for(queue.get(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle stream
+                    yield ": keepalive\n\n"
+                    continue
+                yield f"data: {payload}\n\n"
+        finally:
+            progress_broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def parse_range(range_header: str, total: int):
+    """
+    Parse a single `bytes=` range into an inclusive (start, end) pair.
+    Returns None when the header should be ignored (absent, malformed or multi-range)
+    and raises 416 when the range can't be satisfied.
+    """
+    unit, _, spec = range_header.partition("=")
+    if unit.strip() != "bytes" or "," in spec:
+        return None
+    first, _, last = spec.strip().partition("-")
+    try:
+        if first:
+            start = int(first)
+            end = int(last) if last else total - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(total - int(last), 0)
+            end = total - 1
+    except ValueError:
+        return None
+    if start >= total or start > end:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{total}"},
+        )
+    return start, min(end, total - 1)
+
+
+async def read_legacy_image_chunk(
+    image_id: str, version, start: int, length: int
+) -> bytes:
+    """
+    Read `length` bytes starting at offset `start` (0-based) from images.data, for
+    rows not yet moved to the blob store by migrate_blobs.py.
+    The row must still match `version`; a rewrite or delete mid-stream raises.
+    """
+    total, completed_at = version
+    async with db_pool.connection() as conn:
+        cur = await conn.execute(
+            """
+            SELECT substring(data FROM %s FOR %s) FROM images
+            WHERE id = %s
+              AND octet_length(data) = %s
+              AND job->>'completed_at' IS NOT DISTINCT FROM %s
+            """,
+            (start + 1, length, image_id, total, completed_at),
+        )
+        row = await cur.fetchone()
+    if row is None:
+        raise RuntimeError(f"Image {image_id} changed while streaming")
+    return row[0]
+
+
 @app.get("/images/{image_id}")
-async def get_image(image_id: str):
-    """Retrieve the image content by ID."""
+async def get_image(image_id: str, request: Request):
+    """
+    Retrieve the image content by ID.
+    Supports conditional requests (ETag/If-None-Match) and single byte ranges; bodies
+    larger than API_IMAGE_CHUNK_SIZE are streamed out of the blob store chunk by chunk.
+    """
     logger.info(f"Endpoint called: GET /images/{image_id}")
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("SELECT data FROM images WHERE id = %s", (image_id,))
-        row = cur.fetchone()
-        cur.close()
-        conn.close()
-        if row is None:
+        async with db_pool.connection() as conn:
+            # octet_length() on an uncompressed (EXTERNAL) value doesn't detoast it
+            cur = await conn.execute(
+                f"""
+                SELECT id, blob_key, octet_length(data), job->>'completed_at'
+                FROM images WHERE id = {RESOLVE_ALIAS}
+                """,
+                (image_id, image_id),
+            )
+            row = await cur.fetchone()
+        if row is None or (row[1] is None and row[2] is None):
             logger.warning(f"Image not found: {image_id}")
             raise HTTPException(status_code=404, detail="Image not found")
-        image_data = row[0]
-        logger.info(f"Retrieved image: {image_id}, size: {len(image_data)} bytes")
-        return Response(content=image_data, media_type="image/jpeg")
+        canonical_id, blob_key, legacy_size, completed_at = row
+
+        if blob_key:
+            # Blobs are immutable and keyed by content hash: the key is the ETag
+            try:
+                total = await run_in_threadpool(blob_store.size, blob_key)
+            except FileNotFoundError:
+                logger.warning(f"Image blob missing: {image_id}", blob_key=blob_key)
+                raise HTTPException(status_code=404, detail="Image not found")
+            etag = f'"{blob_key}"'
+
+            async def read_chunk(start: int, length: int) -> bytes:
+                return await run_in_threadpool(
+                    blob_store.read_range, blob_key, start, length
+                )
+
+        else:
+            # The content only changes when the scheduler writes the processed image
+            total = legacy_size
+            etag = f'"{image_id}-{total}-{completed_at or "original"}"'
+
+            async def read_chunk(start: int, length: int) -> bytes:
+                return await read_legacy_image_chunk(
+                    canonical_id, (total, completed_at), start, length
+                )
+
+        headers = {
+            "ETag": etag,
+            "Accept-Ranges": "bytes",
+            # Processed images are final; originals are revalidated until then
+            "Cache-Control": (
+                f"public, max-age={IMAGE_CACHE_MAX_AGE}, immutable"
+                if completed_at
+                else "no-cache"
+            ),
+        }
+        if etag in request.headers.get("if-none-match", ""):
+            logger.info(f"Image not modified: {image_id}")
+            return Response(status_code=304, headers=headers)
+
+        status_code = 200
+        start, end = 0, total - 1
+        byte_range = None
+        if_range = request.headers.get("if-range")
+        if "range" in request.headers and (if_range is None or if_range == etag):
+            byte_range = parse_range(request.headers["range"], total)
+        if byte_range:
+            status_code = 206
+            start, end = byte_range
+            headers["Content-Range"] = f"bytes {start}-{end}/{total}"
+        length = end - start + 1
+        headers["Content-Length"] = str(length)
+
+        if length <= IMAGE_CHUNK_SIZE:
+            data = await read_chunk(start, length)
+            logger.info(f"Retrieved image: {image_id}, size: {len(data)} bytes")
+            return Response(
+                content=data,
+                status_code=status_code,
+                media_type="image/jpeg",
+                headers=headers,
+            )
+
+        async def stream():
+            offset = start
+            while offset <= end:
+                size = min(IMAGE_CHUNK_SIZE, end - offset + 1)
+                yield await read_chunk(offset, size)
+                offset += size
+
+        logger.info(f"Streaming image: {image_id}, size: {length} bytes")
+        return StreamingResponse(
+            stream(),
+            status_code=status_code,
+            media_type="image/jpeg",
+            headers=headers,
+        )
     except HTTPException:
         raise
+    except PoolTimeout as e:
+        raise pool_exhausted(e)
     except Exception as e:
         logger.error(f"Error retrieving image {image_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -119,25 +673,43 @@ async def delete_image(image_id: str):
     """Delete an image row from the database by ID."""
     logger.info(f"Endpoint called: DELETE /image/{image_id}")
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        # Use RETURNING to check if a row was actually deleted
-        cur.execute("DELETE FROM images WHERE id = %s RETURNING id", (image_id,))
-        deleted = cur.fetchone()
+        # The pool connection context commits on success and rolls back on error
+        async with db_pool.connection() as conn:
+            # Use RETURNING to check if a row was actually deleted, and leave a
+            # tombstone so change-feed clients learn about the deletion. An
+            # alias id only drops the alias; the image and its other aliases stay
+            cur = await conn.execute(
+                """
+                WITH deleted_alias AS (
+                    DELETE FROM image_aliases WHERE id = %s RETURNING id
+                ),
+                deleted_image AS (
+                    DELETE FROM images WHERE id = %s RETURNING id
+                ),
+                deleted AS (
+                    SELECT id FROM deleted_alias
+                    UNION ALL
+                    SELECT id FROM deleted_image
+                )
+                INSERT INTO image_tombstones (id)
+                SELECT id FROM deleted
+                ON CONFLICT (id) DO UPDATE SET deleted_at = CURRENT_TIMESTAMP
+                RETURNING id
+                """,
+                (image_id, image_id),
+            )
+            deleted = await cur.fetchone()
+            await prune_tombstones(conn)
         if deleted is None:
-            conn.rollback()
-            cur.close()
-            conn.close()
             logger.warning(f"Image not found for deletion: {image_id}")
             raise HTTPException(status_code=404, detail="Image not found")
-        conn.commit()
-        cur.close()
-        conn.close()
         logger.info(f"Deleted image: {image_id}")
         # 204 No Content
         return Response(status_code=204)
     except HTTPException:
         raise
+    except PoolTimeout as e:
+        raise pool_exhausted(e)
     except Exception as e:
         logger.error(f"Error deleting image {image_id}: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -148,15 +720,23 @@ async def delete_all_images():
     """Delete all images from the database."""
     logger.info("Endpoint called: DELETE /all")
     try:
-        conn = get_db_connection()
-        cur = conn.cursor()
-        cur.execute("DELETE FROM images")
-        deleted_count = cur.rowcount
-        conn.commit()
-        cur.close()
-        conn.close()
+        async with db_pool.connection() as conn:
+            cur = await conn.execute(
+                """
+                WITH deleted AS (
+                    DELETE FROM images RETURNING id
+                )
+                INSERT INTO image_tombstones (id)
+                SELECT id FROM deleted
+                ON CONFLICT (id) DO UPDATE SET deleted_at = CURRENT_TIMESTAMP
+                """
+            )
+            deleted_count = cur.rowcount
+            await prune_tombstones(conn)
         logger.info(f"Deleted {deleted_count} images from database")
         return Response(status_code=204)
+    except PoolTimeout as e:
+        raise pool_exhausted(e)
     except Exception as e:
         logger.error(f"Error deleting all images: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -111,6 +111,13 @@ Uploads PVC name
 {{- printf "%s-uploads" (include "imagomortis.fullname" .) }}
 {{- end }}
 
+{{/*
+Blob store PVC name
+*/}}
+{{- define "imagomortis.blobsPvcName" -}}
+{{- printf "%s-blobs" (include "imagomortis.fullname" .) }}
+{{- end }}
+
 {{/*
 Postgres PVC name
 */}}
@@ -1,8 +1,17 @@
 import typer
 import cv2
-import random
+import hashlib
+import json
+import numpy as np
+import os
+import threading
 import time
 import sys
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import NamedTuple, Optional
 from loguru import logger
 
 # Configure Loguru
@@ -11,6 +20,291 @@ logger.add(sys.stdout, serialize=True, enqueue=True)
 
 app = typer.Typer()
 
+# Files picked up when batch --manifest is a directory
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+
+TOTAL_CIRCLES = 15
+BORDER_THICKNESS = 5
+
+# Exit codes telling the scheduler whether a retry may succeed (sysexits.h
+# EX_TEMPFAIL and EX_DATAERR); anything else, e.g. a crash, counts as transient
+EXIT_TRANSIENT = 75
+EXIT_PERMANENT = 65
+FAILURE_KINDS = ("transient", "permanent")
+
+# Inputs named blob://<key> are read from the blob store, and an output named
+# blob:// is stored there under its content key, which process_file returns
+BLOB_PREFIX = "blob://"
+# Output keys are reported here when the process exits (read by the scheduler
+# from the pod status; Kubernetes keeps the first 4096 bytes)
+TERMINATION_LOG = os.getenv("IMAGE_TASK_TERMINATION_LOG", "/dev/termination-log")
+
+# Blob store configuration (same settings as the scheduler)
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "./blobs")
+BLOB_STORE_S3_BUCKET = os.getenv("BLOB_STORE_S3_BUCKET", "imagomortis")
+BLOB_STORE_S3_ENDPOINT = os.getenv("BLOB_STORE_S3_ENDPOINT") or None
+
+
+class TaskFailed(Exception):
+    """Processing an image failed; the message says why."""
+
+    def __init__(self, message: str, transient: bool):
+        super().__init__(message)
+        # Whether the same input might succeed on another attempt
+        self.transient = transient
+
+    @property
+    def exit_code(self) -> int:
+        return EXIT_TRANSIENT if self.transient else EXIT_PERMANENT
+
+
+class LocalBlobStore:
+    """Content-addressed blobs on a local (or PVC-mounted) filesystem."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def put(self, data) -> str:
+        """Store data and return its key (the SHA-256 of the content)."""
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write under a temporary name so readers never see a partial blob
+            tmp_path = path.with_name(f".{key}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        else:
+            # Refresh the mtime so garbage collection treats the blob as new again
+            os.utime(path)
+        return key
+
+    def get(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+
+class S3BlobStore:
+    """Content-addressed blobs in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(self, bucket: str, endpoint_url: str = None):
+        # Only needed for this backend; credentials come from the AWS_* env vars
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def put(self, data) -> str:
+        """Store data and return its key (the SHA-256 of the content)."""
+        key = hashlib.sha256(data).hexdigest()
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(data))
+        return key
+
+    def get(self, key: str) -> bytes:
+        try:
+            response = self.client.get_object(Bucket=self.bucket, Key=key)
+        except self.client.exceptions.NoSuchKey:
+            raise FileNotFoundError(key)
+        return response["Body"].read()
+
+
+def get_blob_store():
+    """Build the blob store selected by BLOB_STORE_BACKEND."""
+    if BLOB_STORE_BACKEND == "s3":
+        return S3BlobStore(BLOB_STORE_S3_BUCKET, BLOB_STORE_S3_ENDPOINT)
+    return LocalBlobStore(BLOB_STORE_PATH)
+
+
+blob_store = get_blob_store()
+
+
+class RenderOptions(NamedTuple):
+    # Progress is reported after each of this many equal chunks of circles
+    progress_steps: int = 5
+    # Simulated latency per progress step (seconds); 0 in production
+    delay_per_step: float = 0.0
+    # Seed for circle placement and failure simulation (None: unpredictable);
+    # anything numpy.random.default_rng accepts
+    seed: Optional[object] = None
+    # Fraction of images failed on purpose, for testing retries; 0 in production
+    failure_rate: float = 0.0
+    # Whether injected failures are "transient" or "permanent"
+    failure_kind: str = "transient"
+
+
+# Shared by every command that processes images
+PROGRESS_STEPS_OPTION = typer.Option(
+    RenderOptions._field_defaults["progress_steps"],
+    "--progress-steps",
+    envvar="IMAGE_TASK_PROGRESS_STEPS",
+    help="Progress updates per image",
+)
+DELAY_PER_STEP_OPTION = typer.Option(
+    RenderOptions._field_defaults["delay_per_step"],
+    "--delay-per-step",
+    envvar="IMAGE_TASK_DELAY_PER_STEP",
+    help="Simulated latency per progress step, in seconds",
+)
+SEED_OPTION = typer.Option(
+    None,
+    "--seed",
+    envvar="IMAGE_TASK_SEED",
+    help="Random seed, for reproducible output",
+)
+FAILURE_RATE_OPTION = typer.Option(
+    RenderOptions._field_defaults["failure_rate"],
+    "--failure-rate",
+    envvar="IMAGE_TASK_FAILURE_RATE",
+    min=0.0,
+    max=1.0,
+    help="Fraction of images to fail on purpose (testing only)",
+)
+FAILURE_KIND_OPTION = typer.Option(
+    RenderOptions._field_defaults["failure_kind"],
+    "--failure-kind",
+    envvar="IMAGE_TASK_FAILURE_KIND",
+    help="Injected failures are 'transient' (retried) or 'permanent'",
+)
+
+
+def render_options(
+    progress_steps: int,
+    delay_per_step: float,
+    seed,
+    failure_rate: float,
+    failure_kind: str,
+) -> RenderOptions:
+    if failure_kind not in FAILURE_KINDS:
+        raise typer.BadParameter(
+            f"must be one of {', '.join(FAILURE_KINDS)}", param_hint="--failure-kind"
+        )
+    return RenderOptions(
+        progress_steps=progress_steps,
+        delay_per_step=delay_per_step,
+        seed=seed,
+        failure_rate=failure_rate,
+        failure_kind=failure_kind,
+    )
+
+
+def random_circles(rng, width: int, height: int, count: int):
+    """Centers and radii of count circles, drawn in one vectorized call each."""
+    min_side = min(width, height)
+    xs = rng.integers(0, width, count)
+    ys = rng.integers(0, height, count)
+    # Ensure radius fits
+    radii = rng.integers(min_side // 8, min_side // 6, count, endpoint=True)
+    return np.stack([xs, ys, radii], axis=1).tolist()
+
+
+def read_image(input_path: str):
+    """Decode the image at input_path (a file or blob://<key>); None if it isn't one."""
+    if not input_path.startswith(BLOB_PREFIX):
+        return cv2.imread(input_path)
+    try:
+        data = blob_store.get(input_path[len(BLOB_PREFIX) :])
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        raise TaskFailed(f"Could not read {input_path}: {e}", transient=True)
+    return cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+
+
+def write_image(img, output_path: str) -> str:
+    """
+    Save img to output_path, a file or blob:// for the blob store. Returns the
+    location written: the path, or blob://<key>.
+    """
+    if output_path.startswith(BLOB_PREFIX):
+        encoded, buffer = cv2.imencode(".jpg", img)
+        if encoded:
+            try:
+                return BLOB_PREFIX + blob_store.put(buffer.tobytes())
+            except Exception as e:
+                raise TaskFailed(f"Could not store image: {e}", transient=True)
+    elif cv2.imwrite(output_path, img):
+        return output_path
+    raise TaskFailed(f"Could not write image to {output_path}", transient=True)
+
+
+def write_termination_message(message: dict):
+    """Report message to Kubernetes, if running in a container that reads it."""
+    try:
+        with open(TERMINATION_LOG, "w") as f:
+            json.dump(message, f)
+    except OSError:
+        pass
+
+
+def process_file(
+    input_path: str,
+    output_path: str,
+    on_progress=None,
+    log=logger,
+    options: RenderOptions = RenderOptions(),
+):
+    """
+    Load an image, draw random white circles on it, and save to output path.
+    Either path may name a blob (see BLOB_PREFIX); returns where the output went.
+    Progress is logged (through log, e.g. a logger bound to a batch item)
+    options.progress_steps times and, if given, passed to on_progress(progress).
+    Raises TaskFailed instead of exiting, so a long-lived worker can call it;
+    TaskFailed.transient tells whether retrying the same input may succeed.
+    """
+    log.info(
+        "Starting image processing", input_path=input_path, output_path=output_path
+    )
+
+    img = read_image(input_path)
+    if img is None:
+        log.error("Could not load image from {input_path}", input_path=input_path)
+        raise TaskFailed(f"Could not load image from {input_path}", transient=False)
+
+    rng = np.random.default_rng(options.seed)
+
+    # Failure injection for testing; drawn from rng so it is seedable too
+    if options.failure_rate and rng.random() < options.failure_rate:
+        log.error(
+            f"Simulated {options.failure_kind} failure "
+            f"({options.failure_rate:.0%} chance)"
+        )
+        raise TaskFailed(
+            f"Simulated {options.failure_kind} failure",
+            transient=options.failure_kind == "transient",
+        )
+
+    height, width = img.shape[:2]
+    circles = random_circles(rng, width, height, TOTAL_CIRCLES)
+
+    # Draw the circles in progress_steps chunks, reporting after each
+    steps = max(1, min(options.progress_steps, TOTAL_CIRCLES))
+    drawn = 0
+    for step in range(1, steps + 1):
+        end = TOTAL_CIRCLES * step // steps
+        for x, y, radius in circles[drawn:end]:
+            cv2.circle(img, (x, y), radius, (255, 255, 255), -1)  # White filled
+            cv2.circle(img, (x, y), radius, (0, 0, 0), BORDER_THICKNESS)  # Outline
+        drawn = end
+
+        percentage = drawn / TOTAL_CIRCLES * 100
+        progress = {"circles": percentage}
+        log.info(
+            f"Drew circle {drawn}/{TOTAL_CIRCLES} ({percentage:.1f}%)",
+            progress=progress,
+        )
+        if on_progress:
+            on_progress(progress)
+        if options.delay_per_step:
+            time.sleep(options.delay_per_step)
+
+    output = write_image(img, output_path)
+    log.info("Image processed and saved", output_path=output)
+    return output
+
 
 @app.command()
 def process_image(
@@ -20,45 +314,238 @@ def process_image(
     output_path: str = typer.Option(
         ..., "--output-path", help="Path to save the output image file"
     ),
+    progress_steps: int = PROGRESS_STEPS_OPTION,
+    delay_per_step: float = DELAY_PER_STEP_OPTION,
+    seed: Optional[int] = SEED_OPTION,
+    failure_rate: float = FAILURE_RATE_OPTION,
+    failure_kind: str = FAILURE_KIND_OPTION,
 ):
     """
-    Load an image, draw random white circles on it, and save to output path.
+    Process one image and exit (one Kubernetes Job per image).
+    Exits with EXIT_TRANSIENT or EXIT_PERMANENT if it fails; on success the
+    output is reported as {"output": ...} in the termination message.
     """
-    logger.info(
-        "Starting image processing", input_path=input_path, output_path=output_path
+    options = render_options(
+        progress_steps, delay_per_step, seed, failure_rate, failure_kind
     )
+    try:
+        output = process_file(input_path, output_path, options=options)
+    except TaskFailed as e:
+        sys.exit(e.exit_code)
+    write_termination_message({"output": output})
 
-    img = cv2.imread(input_path)
-    if img is None:
-        logger.error("Could not load image from {input_path}", input_path=input_path)
-        sys.exit(1)
 
-    # Simulate a random failure with 10% probability for testing
-    if random.random() < 0.1:
-        logger.error("Simulated random failure (10% chance). Exiting.")
-        sys.exit(1)
+def read_manifest(manifest: Path = None, output_dir: Path = None, items: str = None):
+    """
+    Batch items as dicts with id, input_path and output_path.
+    manifest is a JSON list or NDJSON file of such items ("id" defaults to the
+    input file name), or a directory whose image files are written under
+    output_dir with the same names; items is such a JSON list given inline.
+    """
+    if items is not None:
+        text = items
+    elif manifest is None:
+        raise typer.BadParameter("either --manifest or --items is required")
+    elif manifest.is_dir():
+        if output_dir is None:
+            raise typer.BadParameter("--output-dir is required for a directory")
+        return [
+            {
+                "id": path.name,
+                "input_path": str(path),
+                "output_path": str(output_dir / path.name),
+            }
+            for path in sorted(manifest.iterdir())
+            if path.suffix.lower() in IMAGE_SUFFIXES
+        ]
+    else:
+        text = manifest.read_text()
+
+    if text.lstrip().startswith("["):
+        items = json.loads(text)
+    else:
+        items = [json.loads(line) for line in text.splitlines() if line.strip()]
+    for item in items:
+        item.setdefault("id", Path(item["input_path"]).name)
+    return items
 
-    height, width = img.shape[:2]
 
-    # Draw 15 random white circles
-    total_circles = 15
-    for i in range(total_circles):
-        x = random.randint(0, width - 1)
-        y = random.randint(0, height - 1)
-        radius = random.randint(
-            min(width, height) // 8, min(width, height) // 6
-        )  # Ensure radius fits
-        cv2.circle(img, (x, y), radius, (255, 255, 255), -1)  # White filled circle
-        cv2.circle(img, (x, y), radius, (0, 0, 0), 5)  # White filled circle
-        percentage = (i + 1) / total_circles * 100
-        logger.info(
-            f"Drew circle {i+1}/{total_circles} ({percentage:.1f}%)",
-            progress={"circles": percentage},
+@app.command()
+def batch(
+    manifest: Path = typer.Option(
+        None,
+        "--manifest",
+        help="JSON/NDJSON list of {id, input_path, output_path}, or an image directory",
+    ),
+    items: str = typer.Option(
+        None, "--items", help="The same JSON list inline, instead of --manifest"
+    ),
+    output_dir: Path = typer.Option(
+        None, "--output-dir", help="Output directory when --manifest is a directory"
+    ),
+    workers: int = typer.Option(
+        os.cpu_count() or 1, "--workers", help="Images processed at once"
+    ),
+    progress_steps: int = PROGRESS_STEPS_OPTION,
+    delay_per_step: float = DELAY_PER_STEP_OPTION,
+    seed: Optional[int] = SEED_OPTION,
+    failure_rate: float = FAILURE_RATE_OPTION,
+    failure_kind: str = FAILURE_KIND_OPTION,
+):
+    """
+    Process many images in one run (one Kubernetes Job per batch).
+    Progress and the outcome of each item are logged with its id as "item",
+    and the outputs are reported as {"outputs": {id: ...}} in the termination
+    message.
+    Exits with EXIT_TRANSIENT if any item failed transiently, else with
+    EXIT_PERMANENT if any failed. With --seed, item n is seeded with (seed, n),
+    so every item is reproducible without all looking alike.
+    """
+    base_options = render_options(
+        progress_steps, delay_per_step, seed, failure_rate, failure_kind
+    )
+    items = read_manifest(manifest, output_dir, items)
+    if output_dir is not None:
+        output_dir.mkdir(parents=True, exist_ok=True)
+    logger.info("Starting batch", items=len(items), workers=workers)
+    outputs = {}
+
+    def run(index_item):
+        index, item = index_item
+        log = logger.bind(item=item["id"])
+        options = base_options._replace(
+            seed=None if seed is None else (seed, index)
         )
-        time.sleep(1)
+        try:
+            output = process_file(
+                item["input_path"], item["output_path"], log=log, options=options
+            )
+        except Exception as e:
+            transient = e.transient if isinstance(e, TaskFailed) else True
+            log.error(
+                "Item failed", outcome="failed", error=str(e), transient=transient
+            )
+            return e.exit_code if isinstance(e, TaskFailed) else EXIT_TRANSIENT
+        log.info("Item succeeded", outcome="succeeded", output=output)
+        outputs[item["id"]] = output
+        return 0
+
+    # cv2 releases the GIL while it works, so threads use all the cores
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = list(executor.map(run, enumerate(items)))
+
+    failed = len(results) - results.count(0)
+    logger.info("Batch finished", succeeded=len(results) - failed, failed=failed)
+    write_termination_message({"outputs": outputs})
+    if failed:
+        sys.exit(EXIT_TRANSIENT if EXIT_TRANSIENT in results else EXIT_PERMANENT)
+
+
+class WorkerHandler(BaseHTTPRequestHandler):
+    """
+    POST /process {"input_path": ..., "output_path": ...} processes one image
+    (an optional "seed" overrides the worker's). The response is NDJSON: one
+    {"progress": {...}} line per step, then {"status": "succeeded", "output": ...} or
+    {"status": "failed", "error": ..., "transient": ...}. Requests beyond the worker's
+    concurrency get 503 so the caller can try again.
+    """
+
+    # Set by worker()
+    slots: threading.Semaphore = None
+    options: RenderOptions = RenderOptions()
+
+    def do_GET(self):
+        if self.path != "/healthz":
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def do_POST(self):
+        if self.path != "/process":
+            self.send_error(404)
+            return
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+            request = json.loads(self.rfile.read(length))
+            input_path = request["input_path"]
+            output_path = request["output_path"]
+            options = self.options._replace(seed=request.get("seed", self.options.seed))
+        except (ValueError, KeyError, TypeError):
+            self.send_error(400, "Expected a JSON body with input_path and output_path")
+            return
+
+        if not self.slots.acquire(blocking=False):
+            self.send_error(503, "Worker busy")
+            return
+        try:
+            # No Content-Length: the body ends when the connection closes
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.end_headers()
 
-    cv2.imwrite(output_path, img)
-    logger.info("Image processed and saved", output_path=output_path)
+            def send(message):
+                self.wfile.write(json.dumps(message).encode() + b"\n")
+                self.wfile.flush()
+
+            try:
+                output = process_file(
+                    input_path,
+                    output_path,
+                    on_progress=lambda progress: send({"progress": progress}),
+                    options=options,
+                )
+                send({"status": "succeeded", "output": output})
+            except TaskFailed as e:
+                send({"status": "failed", "error": str(e), "transient": e.transient})
+            except Exception as e:
+                logger.exception("Unexpected error processing image")
+                send({"status": "failed", "error": str(e), "transient": True})
+        finally:
+            self.slots.release()
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+@app.command()
+def worker(
+    host: str = typer.Option(
+        "0.0.0.0", "--host", envvar="IMAGE_TASK_HOST", help="Address to listen on"
+    ),
+    port: int = typer.Option(
+        8080, "--port", envvar="IMAGE_TASK_PORT", help="Port to listen on"
+    ),
+    concurrency: int = typer.Option(
+        os.cpu_count() or 1,
+        "--concurrency",
+        envvar="IMAGE_TASK_CONCURRENCY",
+        help="Images processed at once",
+    ),
+    progress_steps: int = PROGRESS_STEPS_OPTION,
+    delay_per_step: float = DELAY_PER_STEP_OPTION,
+    seed: Optional[int] = SEED_OPTION,
+    failure_rate: float = FAILURE_RATE_OPTION,
+    failure_kind: str = FAILURE_KIND_OPTION,
+):
+    """
+    Run as a long-lived worker that processes images sent by the scheduler.
+    """
+    WorkerHandler.slots = threading.Semaphore(concurrency)
+    WorkerHandler.options = render_options(
+        progress_steps, delay_per_step, seed, failure_rate, failure_kind
+    )
+    server = ThreadingHTTPServer((host, port), WorkerHandler)
+    server.daemon_threads = True
+    logger.info("Worker listening", host=host, port=port, concurrency=concurrency)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("Stopping worker")
+    finally:
+        server.server_close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,144 @@
+"""
+Maintenance tool for the image blob store.
+
+    python migrate_blobs.py migrate [--batch-size 100]
+        Move image bytes still stored in images.data into the blob store and
+        replace them with a blob_key reference, recording the content hash of
+        originals for deduplication. Safe to run while the services
+        are up and to re-run after an interruption. Run `VACUUM FULL images`
+        afterwards to give the space back to the filesystem.
+
+    python migrate_blobs.py gc [--grace-seconds 3600] [--dry-run]
+        Delete blobs no longer referenced by any image (deleted images,
+        originals replaced by processed output). Blobs younger than the grace
+        period are kept, since their row may not be committed yet.
+"""
+
+import argparse
+import time
+
+from pusher import (
+    BLOB_STORE_BACKEND,
+    blob_store,
+    get_db_connection,
+    init_db,
+    logger,
+)
+
+
+def migrate(batch_size: int):
+    """Move images.data into the blob store, one locked batch at a time."""
+    conn = get_db_connection()
+    migrated = 0
+    try:
+        while True:
+            cur = conn.cursor()
+            try:
+                # SKIP LOCKED lets several migrations (or the scheduler) run alongside
+                cur.execute(
+                    """
+                    SELECT id, data FROM images
+                    WHERE blob_key IS NULL AND data IS NOT NULL
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                    """,
+                    (batch_size,),
+                )
+                rows = cur.fetchall()
+                if not rows:
+                    conn.rollback()
+                    break
+
+                for image_id, data in rows:
+                    blob_key = blob_store.put(data)
+                    # An original's content_hash is its blob key, so dedup matches
+                    # it; processed output and duplicate originals get none
+                    cur.execute(
+                        """
+                        UPDATE images
+                        SET blob_key = %s, data = NULL,
+                            content_hash = COALESCE(
+                                content_hash,
+                                CASE WHEN job->>'completed' IS NULL
+                                    AND NOT EXISTS (
+                                        SELECT 1 FROM images other
+                                        WHERE other.content_hash = %s
+                                    )
+                                THEN %s END
+                            )
+                        WHERE id = %s
+                        """,
+                        (blob_key, blob_key, blob_key, image_id),
+                    )
+                conn.commit()
+                migrated += len(rows)
+                logger.info(f"Migrated {len(rows)} images", total=migrated)
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                cur.close()
+    finally:
+        conn.close()
+
+    logger.info(f"Migration complete: {migrated} images moved to the blob store")
+
+
+def gc(grace_seconds: int, dry_run: bool):
+    """Delete blobs that no image references anymore."""
+    # Snapshot the candidates first: anything written after this point is younger
+    # than the cutoff and therefore kept.
+    cutoff = time.time() - grace_seconds
+    candidates = [key for key, modified in blob_store.keys() if modified < cutoff]
+
+    conn = get_db_connection()
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT DISTINCT blob_key FROM images WHERE blob_key IS NOT NULL")
+        referenced = {row[0] for row in cur.fetchall()}
+    finally:
+        cur.close()
+        conn.close()
+
+    deleted = 0
+    for key in candidates:
+        if key in referenced:
+            continue
+        # A re-upload of the same content may have refreshed the blob since listing
+        if blob_store.last_modified(key) >= cutoff:
+            continue
+        if not dry_run:
+            blob_store.delete(key)
+        deleted += 1
+
+    logger.info(
+        f"Garbage collection complete: {deleted} unreferenced blobs"
+        + (" found (dry run)" if dry_run else " deleted"),
+        candidates=len(candidates),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_parser = commands.add_parser("migrate", help="Move images.data to blobs")
+    migrate_parser.add_argument("--batch-size", type=int, default=100)
+
+    gc_parser = commands.add_parser("gc", help="Delete unreferenced blobs")
+    gc_parser.add_argument("--grace-seconds", type=int, default=3600)
+    gc_parser.add_argument("--dry-run", action="store_true")
+
+    args = parser.parse_args()
+    logger.info(f"Using {BLOB_STORE_BACKEND} blob store")
+
+    if args.command == "migrate":
+        # Make sure the blob_key column exists before moving anything
+        init_db()
+        migrate(args.batch_size)
+    else:
+        gc(args.grace_seconds, args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
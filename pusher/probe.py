@@ -0,0 +1,178 @@
+"""
+Fast metadata probe for uploaded images.
+
+Dimensions, color mode and EXIF orientation are read straight from the JPEG
+segment headers or the PNG IHDR chunk, so no pixel data is decoded for them.
+The perceptual hash is a 64-bit difference hash (dHash) computed from a
+draft-mode decode, which lets libjpeg scale down by 8 in the DCT domain.
+Anything the header parser doesn't recognise is handed to Pillow.
+"""
+
+import struct
+from typing import NamedTuple, Optional
+
+from PIL import Image
+
+JPEG_SOI = b"\xff\xd8"
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+# Start-of-frame markers carry the dimensions; C4 (DHT), C8 (JPG) and CC (DAC)
+# share the range but are not frames
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+# Markers without a length field
+JPEG_STANDALONE_MARKERS = set(range(0xD0, 0xD8)) | {0x01}
+# Pillow mode names, so both probe paths agree
+JPEG_COMPONENT_MODES = {1: "L", 3: "RGB", 4: "CMYK"}
+PNG_COLOR_TYPE_MODES = {0: "L", 2: "RGB", 3: "P", 4: "LA", 6: "RGBA"}
+
+EXIF_ORIENTATION_TAG = 0x0112
+# How to turn a stored image upright for each EXIF orientation value
+ORIENTATION_TRANSPOSE = {
+    2: Image.FLIP_LEFT_RIGHT,
+    3: Image.ROTATE_180,
+    4: Image.FLIP_TOP_BOTTOM,
+    5: Image.TRANSPOSE,
+    6: Image.ROTATE_270,
+    7: Image.TRANSVERSE,
+    8: Image.ROTATE_90,
+}
+
+# dHash compares horizontally adjacent pixels of a 9x8 thumbnail: 64 bits
+HASH_SIZE = 8
+
+
+class ImageProbe(NamedTuple):
+    width: int
+    height: int
+    color_mode: str
+    # EXIF orientation (1-8); 1 when the image has none
+    orientation: int
+    # Signed 64-bit dHash (fits a BIGINT column); None if the pixels don't decode
+    phash: Optional[int]
+
+    @property
+    def resolution(self) -> str:
+        return f"{self.width}x{self.height}"
+
+
+def _exif_orientation(exif: bytes) -> int:
+    """Read the orientation tag from IFD0 of a TIFF-formatted EXIF block."""
+    byte_order = {b"II": "<", b"MM": ">"}.get(exif[:2])
+    if byte_order is None:
+        return 1
+    ifd_offset = struct.unpack(byte_order + "I", exif[4:8])[0]
+    (count,) = struct.unpack(byte_order + "H", exif[ifd_offset : ifd_offset + 2])
+    for i in range(count):
+        entry = ifd_offset + 2 + i * 12
+        tag = struct.unpack(byte_order + "H", exif[entry : entry + 2])[0]
+        if tag == EXIF_ORIENTATION_TAG:
+            value = struct.unpack(byte_order + "H", exif[entry + 8 : entry + 10])[0]
+            return value if value in range(1, 9) else 1
+    return 1
+
+
+def _probe_jpeg(data):
+    """Walk the JPEG segments up to the first frame header."""
+    orientation = 1
+    pos = 2
+    end = len(data)
+    while pos < end:
+        if data[pos] != 0xFF:
+            return None
+        # Any number of 0xFF fill bytes may precede a marker
+        while pos < end and data[pos] == 0xFF:
+            pos += 1
+        if pos + 2 >= end:
+            return None
+        marker = data[pos]
+        pos += 1
+        if marker in JPEG_STANDALONE_MARKERS:
+            continue
+        # End of image or start of scan before any frame header: malformed
+        if marker in (0xD9, 0xDA):
+            return None
+        (length,) = struct.unpack(">H", data[pos : pos + 2])
+        segment = data[pos + 2 : pos + length]
+        if marker == 0xE1 and segment[:6] == b"Exif\x00\x00":
+            try:
+                orientation = _exif_orientation(segment[6:])
+            except struct.error:
+                orientation = 1
+        elif marker in JPEG_SOF_MARKERS:
+            height, width, components = struct.unpack(">HHB", segment[1:6])
+            mode = JPEG_COMPONENT_MODES.get(components)
+            if mode is None or not width or not height:
+                return None
+            return width, height, mode, orientation
+        pos += length
+    return None
+
+
+def _probe_png(data):
+    """Read the IHDR chunk, which the PNG spec requires to come first."""
+    if data[12:16] != b"IHDR":
+        return None
+    width, height, _bit_depth, color_type = struct.unpack(">IIBB", data[16:26])
+    mode = PNG_COLOR_TYPE_MODES.get(color_type)
+    if mode is None:
+        return None
+    return width, height, mode, 1
+
+
+def _probe_pillow(data):
+    """Fallback for formats (or files) the header parsers don't handle."""
+    data.seek(0)
+    with Image.open(data) as img:
+        orientation = img.getexif().get(EXIF_ORIENTATION_TAG, 1)
+        return img.width, img.height, img.mode, orientation
+
+
+def difference_hash(data, orientation: int = 1) -> Optional[int]:
+    """64-bit dHash of the upright image, as a signed integer."""
+    try:
+        data.seek(0)
+        with Image.open(data) as img:
+            # JPEG only: decode straight to grayscale at 1/2, 1/4 or 1/8 scale
+            img.draft("L", (HASH_SIZE + 1, HASH_SIZE))
+            small = img.convert("L")
+    except Exception:
+        return None
+    if orientation in ORIENTATION_TRANSPOSE:
+        small = small.transpose(ORIENTATION_TRANSPOSE[orientation])
+    pixels = list(small.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).getdata())
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            left = pixels[offset + col]
+            right = pixels[offset + col + 1]
+            value = (value << 1) | (left > right)
+    # Postgres has no unsigned BIGINT
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def probe_image(data) -> ImageProbe:
+    """Probe an image held in a seekable buffer (an mmap of the upload).
+
+    Raises whatever Pillow raises when the data isn't an image at all.
+    """
+    header = None
+    try:
+        if data[:2] == JPEG_SOI:
+            header = _probe_jpeg(data)
+        elif data[:8] == PNG_SIGNATURE:
+            header = _probe_png(data)
+    except (struct.error, IndexError):
+        header = None
+    if header is None:
+        header = _probe_pillow(data)
+
+    width, height, mode, orientation = header
+    return ImageProbe(
+        width=width,
+        height=height,
+        color_mode=mode,
+        orientation=orientation,
+        phash=difference_hash(data, orientation),
+    )
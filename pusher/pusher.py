@@ -1,12 +1,21 @@
 import os
 import sys
+import mmap
 import time
 import uuid
+import hashlib
 import psycopg2
+from concurrent.futures import ThreadPoolExecutor
+from psycopg2.extras import execute_values
 from pathlib import Path
 from loguru import logger
-from PIL import Image
-import io
+
+from probe import probe_image
+
+try:
+    from inotify_simple import INotify, flags as inotify_flags
+except ImportError:  # Linux only; polling is used elsewhere
+    INotify = None
 
 # Configure Loguru
 logger.remove()
@@ -16,6 +25,17 @@ logger.add(sys.stdout, serialize=True, enqueue=True)
 # Use coherent PUSHER_ prefix; fall back to shared names
 STORAGE_PATH = "./uploads"
 POLL_INTERVAL = int(os.getenv("PUSHER_POLL_INTERVAL", "5"))
+# Watch the upload folder with inotify instead of polling it
+WATCH_ENABLED = os.getenv("PUSHER_WATCH", "true").lower() in ("1", "true", "yes")
+# Full-scan interval while watching, to catch anything inotify didn't report
+RECONCILE_INTERVAL = int(os.getenv("PUSHER_RECONCILE_INTERVAL", "60"))
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png"}
+# Uploads are inserted in batches of up to BATCH_SIZE files; a partial batch is
+# flushed once its oldest file has waited BATCH_TIMEOUT_MS
+BATCH_SIZE = max(1, int(os.getenv("PUSHER_BATCH_SIZE", "50")))
+BATCH_TIMEOUT_MS = int(os.getenv("PUSHER_BATCH_TIMEOUT_MS", "200"))
+# Threads reading, probing and storing the files of a batch
+WORKERS = max(1, int(os.getenv("PUSHER_WORKERS", "4")))
 
 # Database Configuration
 DB_HOST = os.getenv("PUSHER_DB_HOST", os.getenv("POSTGRES_HOST", "localhost"))
@@ -26,6 +46,115 @@ DB_PASSWORD = os.getenv(
     "PUSHER_DB_PASSWORD", os.getenv("POSTGRES_PASSWORD", "postgres")
 )
 
+# Blob store configuration (shared by pusher, scheduler and API)
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "./blobs")
+BLOB_STORE_S3_BUCKET = os.getenv("BLOB_STORE_S3_BUCKET", "imagomortis")
+BLOB_STORE_S3_ENDPOINT = os.getenv("BLOB_STORE_S3_ENDPOINT") or None
+
+
+class LocalBlobStore:
+    """Content-addressed blobs on a local (or PVC-mounted) filesystem."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        # Fan out over two directory levels to keep directories small
+        return self.root / key[:2] / key[2:4] / key
+
+    def put(self, data) -> str:
+        """Store data and return its key (the SHA-256 of the content)."""
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write under a temporary name so readers never see a partial blob
+            tmp_path = path.with_name(f".{key}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        else:
+            # Refresh the mtime so garbage collection treats the blob as new again
+            os.utime(path)
+        return key
+
+    def get(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+    def size(self, key: str) -> int:
+        return self._path(key).stat().st_size
+
+    def last_modified(self, key: str) -> float:
+        return self._path(key).stat().st_mtime
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        with open(self._path(key), "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+    def delete(self, key: str):
+        self._path(key).unlink(missing_ok=True)
+
+    def keys(self):
+        """Yield (key, last_modified_timestamp) for every stored blob."""
+        for path in self.root.glob("*/*/*"):
+            if not path.name.startswith("."):
+                yield path.name, path.stat().st_mtime
+
+
+class S3BlobStore:
+    """Content-addressed blobs in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(self, bucket: str, endpoint_url: str = None):
+        # Only needed for this backend; credentials come from the AWS_* env vars
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def put(self, data) -> str:
+        """Store data and return its key (the SHA-256 of the content)."""
+        key = hashlib.sha256(data).hexdigest()
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(data))
+        return key
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+    def size(self, key: str) -> int:
+        return self.client.head_object(Bucket=self.bucket, Key=key)["ContentLength"]
+
+    def last_modified(self, key: str) -> float:
+        head = self.client.head_object(Bucket=self.bucket, Key=key)
+        return head["LastModified"].timestamp()
+
+    def read_range(self, key: str, start: int, length: int) -> bytes:
+        response = self.client.get_object(
+            Bucket=self.bucket, Key=key, Range=f"bytes={start}-{start + length - 1}"
+        )
+        return response["Body"].read()
+
+    def delete(self, key: str):
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def keys(self):
+        """Yield (key, last_modified_timestamp) for every stored blob."""
+        paginator = self.client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket):
+            for obj in page.get("Contents", []):
+                yield obj["Key"], obj["LastModified"].timestamp()
+
+
+def get_blob_store():
+    """Build the blob store selected by BLOB_STORE_BACKEND."""
+    if BLOB_STORE_BACKEND == "s3":
+        return S3BlobStore(BLOB_STORE_S3_BUCKET, BLOB_STORE_S3_ENDPOINT)
+    return LocalBlobStore(BLOB_STORE_PATH)
+
+
+blob_store = get_blob_store()
+
 
 def get_db_connection():
     """Establish a connection to the PostgreSQL database."""
@@ -54,6 +183,79 @@ def init_db():
         cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS image_resolution TEXT")
         cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS size BIGINT")
         cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS job JSONB")
+        # JPEG data doesn't compress; storing it uncompressed lets the API read
+        # byte ranges without detoasting the whole value
+        cur.execute("ALTER TABLE images ALTER COLUMN data SET STORAGE EXTERNAL")
+        # Image bytes live in the blob store; rows keep the content hash. `data` is
+        # only set on rows not yet moved by migrate_blobs.py.
+        cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS blob_key TEXT")
+        # Change tracking for the API's incremental list (GET /images?since=)
+        cur.execute(
+            "ALTER TABLE images ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS images_updated_at_idx ON images (updated_at)"
+        )
+        # Header metadata from the probe, for dedup and search
+        cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS orientation SMALLINT")
+        cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS color_mode TEXT")
+        cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS phash BIGINT")
+        cur.execute("CREATE INDEX IF NOT EXISTS images_phash_idx ON images (phash)")
+        # Work queue for the scheduler: pending rows are claimed by priority, then
+        # oldest first, through a partial index that only holds unclaimed rows
+        cur.execute(
+            "ALTER TABLE images ADD COLUMN IF NOT EXISTS priority SMALLINT NOT NULL DEFAULT 0"
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS images_pending_idx ON images (priority DESC, created_at) WHERE job IS NULL"
+        )
+        # Leases: a claimed row belongs to lease_owner until lease_expires_at, which
+        # its scheduler keeps renewing; expired leases are re-queued with backoff
+        cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS lease_owner TEXT")
+        cur.execute(
+            "ALTER TABLE images ADD COLUMN IF NOT EXISTS lease_expires_at TIMESTAMP"
+        )
+        cur.execute(
+            "ALTER TABLE images ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 0"
+        )
+        cur.execute(
+            "ALTER TABLE images ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP"
+        )
+        # Why the last attempt failed, kept while the image waits for a retry
+        cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS last_error TEXT")
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS images_lease_expires_at_idx ON images (lease_expires_at) WHERE lease_expires_at IS NOT NULL"
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS image_tombstones (
+                id UUID PRIMARY KEY,
+                deleted_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS image_tombstones_deleted_at_idx ON image_tombstones (deleted_at)"
+        )
+        # Deduplication: content_hash is the SHA-256 of the normalized JPEG as
+        # uploaded (blob_key changes once the scheduler stores its output). An
+        # upload with known content becomes an alias of the existing image.
+        cur.execute("ALTER TABLE images ADD COLUMN IF NOT EXISTS content_hash TEXT")
+        cur.execute(
+            "CREATE UNIQUE INDEX IF NOT EXISTS images_content_hash_idx ON images (content_hash)"
+        )
+        cur.execute(
+            """
+            CREATE TABLE IF NOT EXISTS image_aliases (
+                id UUID PRIMARY KEY,
+                image_id UUID NOT NULL REFERENCES images (id) ON DELETE CASCADE,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """
+        )
+        cur.execute(
+            "CREATE INDEX IF NOT EXISTS image_aliases_image_id_idx ON image_aliases (image_id)"
+        )
         conn.commit()
         cur.close()
         conn.close()
@@ -64,8 +266,8 @@ def init_db():
         sys.exit(1)
 
 
-def process_image(file_path: Path):
-    """Process a single image file."""
+def load_image(file_path: Path):
+    """Read one upload and store its bytes; returns the row to insert, or None."""
     file_uuid = None
     try:
         # 1. Parse UUID from filename
@@ -75,48 +277,258 @@ def process_image(file_path: Path):
             file_uuid = uuid.UUID(file_uuid_str)
         except ValueError:
             logger.warning(f"Skipping file with invalid UUID format: {file_path.name}")
-            return
+            return None
 
         logger.info(f"Processing file: {file_path.name}", uuid=str(file_uuid))
 
-        # 2. Read file content
-        with open(file_path, "rb") as f:
-            image_data = f.read()
-
-        # 3. Calculate image resolution and size
-        size = len(image_data)
-        img = Image.open(io.BytesIO(image_data))
-        width, height = img.size
-        resolution = f"{width}x{height}"
-
-        # 4. Upload to Postgres
-        conn = get_db_connection()
-        cur = conn.cursor()
+        # 2. Map the file; the probe only touches the headers it needs
         try:
-            # Insert or do nothing if already exists (idempotency)
-            cur.execute(
-                "INSERT INTO images (id, data, image_resolution, size) VALUES (%s, %s, %s, %s) ON CONFLICT (id) DO NOTHING",
-                (str(file_uuid), image_data, resolution, size),
-            )
-            conn.commit()
-            logger.info(f"Uploaded image to DB", uuid=str(file_uuid))
+            f = open(file_path, "rb")
+        except FileNotFoundError:
+            # Already ingested by another replica (or reported twice)
+            logger.debug(f"File already picked up: {file_path.name}")
+            return None
 
-            # 4. Delete file from folder
-            os.remove(file_path)
-            logger.info(f"Deleted local file: {file_path.name}", uuid=str(file_uuid))
+        with f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as image_data:
+            # 3. Resolution, orientation, color mode and perceptual hash
+            size = len(image_data)
+            info = probe_image(image_data)
 
-        except Exception as db_err:
-            conn.rollback()
-            raise db_err
-        finally:
-            cur.close()
-            conn.close()
+            # 4. Store the bytes (idempotent: the key is the content hash)
+            blob_key = blob_store.put(image_data)
+
+        return (
+            str(file_uuid),
+            blob_key,
+            # The content hash is the blob key of the image as uploaded
+            blob_key,
+            info.resolution,
+            size,
+            info.orientation,
+            info.color_mode,
+            info.phash,
+        )
 
     except Exception as e:
         logger.error(
             f"Failed to process file {file_path.name}: {str(e)}",
             uuid=str(file_uuid) if file_uuid else None,
         )
+        return None
+
+
+class ImageBatcher:
+    """Ingest uploads in batches over one long-lived database connection.
+
+    Files are collected until BATCH_SIZE are pending or the oldest has waited
+    BATCH_TIMEOUT_MS, then read and stored by a bounded thread pool and inserted
+    with a single multi-row INSERT. Files are only deleted once that commits, so
+    a failed batch is picked up again by the next scan. A `batch-<id>` folder from
+    the uploader's batch endpoint is always ingested in one transaction of its own.
+    """
+
+    def __init__(self):
+        self.executor = ThreadPoolExecutor(
+            max_workers=WORKERS, thread_name_prefix="pusher"
+        )
+        self.conn = None
+        # dict as an ordered set: inotify and the reconcile scan may both report a file
+        self.pending = {}
+        self.deadline = None
+        # (size, mtime) of files that failed to load (empty, still being written,
+        # not an image...), so scans only retry them once they change
+        self.skipped = {}
+
+    def add(self, files):
+        for file_path in files:
+            self.pending.setdefault(file_path, None)
+        if self.pending and self.deadline is None:
+            self.deadline = time.monotonic() + BATCH_TIMEOUT_MS / 1000
+
+    def timeout(self):
+        """Seconds until the pending batch is due, or None if nothing is pending."""
+        if not self.pending:
+            return None
+        return max(0.0, self.deadline - time.monotonic())
+
+    def ready(self):
+        return len(self.pending) >= BATCH_SIZE or self.timeout() == 0.0
+
+    def flush(self):
+        """Ingest everything pending, BATCH_SIZE files per transaction."""
+        paths = list(self.pending)
+        self.pending.clear()
+        self.deadline = None
+        # Forget skipped files that have since been removed
+        for file_path in [path for path in self.skipped if not path.exists()]:
+            del self.skipped[file_path]
+        files = [path for path in paths if not is_batch_name(path.name)]
+        for i in range(0, len(files), BATCH_SIZE):
+            self.ingest(files[i : i + BATCH_SIZE])
+        for batch_dir in paths:
+            if is_batch_name(batch_dir.name):
+                self.ingest_folder(batch_dir)
+
+    def retryable(self, files):
+        """Drop files that failed to load before and haven't changed since."""
+        fresh = []
+        for file_path in files:
+            skipped = self.skipped.pop(file_path, None)
+            if skipped is not None:
+                try:
+                    signature = file_signature(file_path)
+                except FileNotFoundError:
+                    continue
+                if signature == skipped:
+                    self.skipped[file_path] = skipped
+                    continue
+            fresh.append(file_path)
+        return fresh
+
+    def ingest_folder(self, batch_dir: Path):
+        """Ingest an uploader batch as one unit, then remove its folder."""
+        try:
+            files = scan_uploads(batch_dir)
+        except FileNotFoundError:
+            # Already ingested by another replica (or reported twice)
+            return
+        if files and not self.retryable(files):
+            # Only files that already failed to load are left
+            return
+        if files and not self.ingest(files):
+            return
+        try:
+            batch_dir.rmdir()
+        except FileNotFoundError:
+            pass
+        except OSError:
+            # Files that failed to load stay behind for the next scan
+            logger.warning(f"Batch folder not empty after ingest: {batch_dir.name}")
+
+    def connection(self):
+        if self.conn is None or self.conn.closed:
+            self.conn = get_db_connection()
+        return self.conn
+
+    def ingest(self, files) -> bool:
+        """Insert files in one transaction; False if the transaction failed."""
+        files = self.retryable(files)
+        loaded = []
+        for file_path, row in zip(files, self.executor.map(load_image, files)):
+            if row is not None:
+                loaded.append((file_path, row))
+                continue
+            try:
+                self.skipped[file_path] = file_signature(file_path)
+            except FileNotFoundError:
+                pass
+        if not loaded:
+            return True
+
+        try:
+            conn = self.connection()
+            with conn.cursor() as cur:
+                # Insert or do nothing if the id (re-ingest) or the content
+                # (duplicate upload) already exists
+                inserted = execute_values(
+                    cur,
+                    """
+                    INSERT INTO images (id, blob_key, content_hash, image_resolution, size, orientation, color_mode, phash, updated_at)
+                    VALUES %s ON CONFLICT DO NOTHING
+                    RETURNING id
+                    """,
+                    [row for _, row in loaded],
+                    template="(%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)",
+                    page_size=len(loaded),
+                    fetch=True,
+                )
+                # Point the ids of duplicates at the image that has their content
+                aliased = execute_values(
+                    cur,
+                    """
+                    INSERT INTO image_aliases (id, image_id)
+                    SELECT v.id::uuid, images.id
+                    FROM (VALUES %s) AS v (id, content_hash)
+                    JOIN images ON images.content_hash = v.content_hash
+                    WHERE images.id <> v.id::uuid
+                    ON CONFLICT (id) DO NOTHING
+                    RETURNING id
+                    """,
+                    [(row[0], row[2]) for _, row in loaded],
+                    page_size=len(loaded),
+                    fetch=True,
+                )
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to upload batch of {len(loaded)} images: {str(e)}")
+            self.reset()
+            return False
+        logger.info(
+            f"Uploaded {len(inserted)} images to DB",
+            duplicates=len(aliased),
+        )
+
+        # Delete files from folder (another replica may have beaten us to it)
+        for file_path, row in loaded:
+            file_path.unlink(missing_ok=True)
+            logger.info(f"Deleted local file: {file_path.name}", uuid=row[0])
+        return True
+
+    def reset(self):
+        """Drop the connection after an error; the next batch reconnects."""
+        if self.conn is not None:
+            try:
+                self.conn.close()
+            except Exception:
+                pass
+        self.conn = None
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.reset()
+
+
+def file_signature(file_path: Path):
+    """(size, mtime) of a file, to tell whether it changed since it was last read."""
+    st = file_path.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def is_upload_name(name: str) -> bool:
+    """True for finished uploads; in-progress writes are hidden dotfiles."""
+    return not name.startswith(".") and Path(name).suffix.lower() in IMAGE_SUFFIXES
+
+
+def is_batch_name(name: str) -> bool:
+    """True for published batch folders; the uploader stages them as `.batch-<id>`."""
+    return name.startswith("batch-")
+
+
+def scan_uploads(storage_path: Path):
+    """List finished uploads and batch folders; scandir avoids a stat() per entry."""
+    with os.scandir(storage_path) as entries:
+        return [
+            Path(entry.path)
+            for entry in entries
+            if (entry.is_file() and is_upload_name(entry.name))
+            or (entry.is_dir() and is_batch_name(entry.name))
+        ]
+
+
+def create_watcher(storage_path: Path):
+    """Watch the upload folder with inotify; returns None to fall back to polling."""
+    if not WATCH_ENABLED:
+        return None
+    if INotify is None:
+        logger.warning("inotify not available; falling back to polling")
+        return None
+    watcher = INotify()
+    # A file is complete once it's closed after writing or renamed into the folder;
+    # batch folders are renamed into place
+    watcher.add_watch(
+        str(storage_path), inotify_flags.CLOSE_WRITE | inotify_flags.MOVED_TO
+    )
+    return watcher
 
 
 def main():
@@ -130,26 +542,50 @@ def main():
 
     # Initialize DB
     init_db()
+    logger.info(f"Using {BLOB_STORE_BACKEND} blob store")
 
-    logger.info(f"Monitoring folder: {STORAGE_PATH}")
+    watcher = create_watcher(storage_path)
+    # With inotify the periodic scan only reconciles missed events (e.g. files
+    # written by another node on a network filesystem, or a queue overflow)
+    scan_interval = RECONCILE_INTERVAL if watcher else POLL_INTERVAL
+    logger.info(
+        f"Monitoring folder: {STORAGE_PATH}",
+        watch=watcher is not None,
+        scan_interval=scan_interval,
+    )
 
+    batcher = ImageBatcher()
+    next_scan = 0.0
     while True:
         try:
-            # List files in the directory
-            # We only care about files, and maybe specific extensions if needed.
-            # The uploader saves as .jpg, but we can be generic or specific.
-            files = [f for f in storage_path.iterdir() if f.is_file()]
-
-            for file_path in files:
-                # Filter for likely image files if needed, or just try to process everything
-                if file_path.suffix.lower() in [".jpg", ".jpeg", ".png"]:
-                    process_image(file_path)
+            now = time.monotonic()
+            wait = next_scan - now
+            if batcher.pending:
+                wait = min(wait, batcher.timeout())
+            if now >= next_scan:
+                batcher.add(scan_uploads(storage_path))
+                next_scan = now + scan_interval
+            elif watcher:
+                events = watcher.read(timeout=int(wait * 1000))
+                if any(event.mask & inotify_flags.Q_OVERFLOW for event in events):
+                    logger.warning("inotify queue overflow; rescanning folder")
+                    next_scan = 0.0
+                batcher.add(
+                    storage_path / event.name
+                    for event in events
+                    if event.name
+                    and (is_upload_name(event.name) or is_batch_name(event.name))
+                )
+            elif wait > 0:
+                # Sleep before next poll (or until the pending batch is due)
+                time.sleep(wait)
 
-            # Sleep before next poll
-            time.sleep(POLL_INTERVAL)
+            if batcher.pending and (batcher.ready() or not watcher):
+                batcher.flush()
 
         except KeyboardInterrupt:
             logger.info("Stopping pusher service")
+            batcher.close()
             break
         except Exception as e:
             logger.error(f"Error in main loop: {str(e)}")
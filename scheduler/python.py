@@ -2,17 +2,26 @@ import os
 import sys
 import time
 import uuid
+import hashlib
 import random
 import tempfile
 import shutil
 import psycopg2
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 import json
 import threading
+import socket
+import urllib.error
+import urllib.request
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
+from decimal import Decimal
 from pathlib import Path
 from loguru import logger
 from kubernetes import client, config, watch
 from kubernetes.client.rest import ApiException
+from kubernetes.utils import parse_quantity
 
 # Configure Loguru
 logger.remove()
@@ -25,6 +34,48 @@ IMAGE_TASK_IMAGE = os.getenv(
     "SCHEDULER_IMAGE_TASK_IMAGE", "imagomortis/imagetask:latest"
 )
 
+# "job" runs each image in its own Kubernetes Job; "pool" sends it to the
+# long-lived imagetask workers behind WORKER_URL
+EXECUTION_MODE = os.getenv("SCHEDULER_EXECUTION_MODE", "job")
+WORKER_URL = os.getenv("SCHEDULER_WORKER_URL", "http://imagetask-worker:8080")
+# Images per Kubernetes Job in job mode; more than one runs the imagetask
+# `batch` command over a manifest, amortizing pod start-up across the batch
+JOB_BATCH_SIZE = max(1, int(os.getenv("SCHEDULER_JOB_BATCH_SIZE", "1")))
+# Longest a pool-mode request may go without a byte from the worker, and how
+# long to keep retrying while every worker is busy (seconds)
+WORKER_TIMEOUT = float(os.getenv("SCHEDULER_WORKER_TIMEOUT", "300"))
+
+# Jobs in flight at once from this scheduler process
+MAX_CONCURRENCY = max(1, int(os.getenv("SCHEDULER_MAX_CONCURRENCY", "4")))
+# How often the namespace ResourceQuotas are re-read for backpressure
+QUOTA_REFRESH_INTERVAL = float(os.getenv("SCHEDULER_QUOTA_REFRESH_INTERVAL", "10"))
+# Resource requests for imagetask pods (empty: none). Quotas on requests.cpu /
+# requests.memory can only be honoured when these are set.
+JOB_CPU_REQUEST = os.getenv("SCHEDULER_JOB_CPU_REQUEST", "")
+JOB_MEMORY_REQUEST = os.getenv("SCHEDULER_JOB_MEMORY_REQUEST", "")
+
+# Progress from the imagetask logs is coalesced per image and written at most
+# once per interval (seconds), for all images in one statement
+PROGRESS_FLUSH_INTERVAL = float(os.getenv("SCHEDULER_PROGRESS_FLUSH_INTERVAL", "1"))
+
+# Leases: claimed rows are owned by this process until their lease expires; a
+# heartbeat renews them every LEASE_TTL / 3 seconds
+SCHEDULER_ID = f"{socket.gethostname()}-{uuid.uuid4().hex[:8]}"
+LEASE_TTL = int(os.getenv("SCHEDULER_LEASE_TTL", "60"))
+# How often one scheduler (whichever gets REAPER_LOCK_ID) re-queues expired
+# leases and removes orphaned imagetask Jobs and shared files
+REAPER_INTERVAL = float(os.getenv("SCHEDULER_REAPER_INTERVAL", "30"))
+REAPER_LOCK_ID = 0x696D676D  # "imgm"
+# Attempts per image before it is marked failed; retry n waits
+# RETRY_BACKOFF * 2^(n-1) seconds, capped at RETRY_BACKOFF_MAX. Transient
+# failures (lost leases, crashes, I/O errors) are retried; permanent ones
+# (the imagetask exits with IMAGE_TASK_EXIT_PERMANENT) are not.
+MAX_ATTEMPTS = int(os.getenv("SCHEDULER_MAX_ATTEMPTS", "3"))
+RETRY_BACKOFF = float(os.getenv("SCHEDULER_RETRY_BACKOFF", "30"))
+RETRY_BACKOFF_MAX = float(os.getenv("SCHEDULER_RETRY_BACKOFF_MAX", "600"))
+# Exit code of an imagetask that failed in a way retrying can't fix
+IMAGE_TASK_EXIT_PERMANENT = 65
+
 # Database Configuration
 DB_HOST = os.getenv("SCHEDULER_DB_HOST", os.getenv("POSTGRES_HOST", "localhost"))
 DB_PORT = os.getenv("SCHEDULER_DB_PORT", os.getenv("POSTGRES_PORT", "5432"))
@@ -36,6 +87,104 @@ DB_PASSWORD = os.getenv(
 
 # Shared volume path (mounted in both scheduler and jobs)
 SHARED_VOLUME_PATH = os.getenv("SCHEDULER_SHARED_VOLUME_PATH", "/app/shared")
+SHARED_PVC_NAME = os.getenv("SCHEDULER_SHARED_PVC_NAME", "scheduler-shared-pvc")
+# How images reach the imagetask: "volume" stages them as files on the shared
+# volume; "blob" has the imagetask read its input and store its output in the
+# blob store by key, which takes the shared volume out of the path
+TRANSPORT = os.getenv("SCHEDULER_TRANSPORT", "volume")
+# imagetask paths naming a blob: blob://<key> to read, blob:// to store
+IMAGE_TASK_BLOB_PREFIX = "blob://"
+# imagetask options (see image_task/README.md) passed on to Job containers,
+# when set, so Jobs process images like pool workers do
+IMAGE_TASK_OPTIONS = (
+    "IMAGE_TASK_PROGRESS_STEPS",
+    "IMAGE_TASK_DELAY_PER_STEP",
+    "IMAGE_TASK_SEED",
+    "IMAGE_TASK_FAILURE_RATE",
+    "IMAGE_TASK_FAILURE_KIND",
+)
+# Longest to wait, after a Job finishes, for its pod's final status (exit code
+# and termination message), which comes through a different watch
+POD_STATUS_GRACE = 10
+
+# Jobs and pods created by the scheduler carry this label; the shared informers
+# only watch these
+MANAGED_BY_SELECTOR = "app.kubernetes.io/managed-by=scheduler"
+# Server-side timeout of each watch request; the watch resumes from the last
+# resourceVersion it saw, so this only bounds how long a dead connection lingers
+WATCH_TIMEOUT = 300
+
+# Postgres NOTIFY channel the API relays to browsers as Server-Sent Events
+PROGRESS_CHANNEL = "image_progress"
+
+# Blob store configuration (shared by pusher, scheduler and API)
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "./blobs")
+BLOB_STORE_S3_BUCKET = os.getenv("BLOB_STORE_S3_BUCKET", "imagomortis")
+BLOB_STORE_S3_ENDPOINT = os.getenv("BLOB_STORE_S3_ENDPOINT") or None
+# Passed on to imagetask Jobs in blob transport: the PVC of a local blob store,
+# and the Secret with the AWS_* credentials of an s3 one
+BLOBS_PVC_NAME = os.getenv("SCHEDULER_BLOBS_PVC_NAME", "blobs-pvc")
+BLOB_STORE_SECRET = os.getenv("SCHEDULER_BLOB_STORE_SECRET", "")
+
+
+class LocalBlobStore:
+    """Content-addressed blobs on a local (or PVC-mounted) filesystem."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def put(self, data) -> str:
+        """Store data and return its key (the SHA-256 of the content)."""
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write under a temporary name so readers never see a partial blob
+            tmp_path = path.with_name(f".{key}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        else:
+            # Refresh the mtime so garbage collection treats the blob as new again
+            os.utime(path)
+        return key
+
+    def get(self, key: str) -> bytes:
+        return self._path(key).read_bytes()
+
+
+class S3BlobStore:
+    """Content-addressed blobs in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(self, bucket: str, endpoint_url: str = None):
+        # Only needed for this backend; credentials come from the AWS_* env vars
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def put(self, data) -> str:
+        """Store data and return its key (the SHA-256 of the content)."""
+        key = hashlib.sha256(data).hexdigest()
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(data))
+        return key
+
+    def get(self, key: str) -> bytes:
+        return self.client.get_object(Bucket=self.bucket, Key=key)["Body"].read()
+
+
+def get_blob_store():
+    """Build the blob store selected by BLOB_STORE_BACKEND."""
+    if BLOB_STORE_BACKEND == "s3":
+        return S3BlobStore(BLOB_STORE_S3_BUCKET, BLOB_STORE_S3_ENDPOINT)
+    return LocalBlobStore(BLOB_STORE_PATH)
+
+
+blob_store = get_blob_store()
 
 
 def get_db_connection():
@@ -45,6 +194,18 @@ def get_db_connection():
     )
 
 
+def notify_job_event(cur, image_id: str, job_id: str, state: str, progress=None):
+    """
+    Publish a compact job event on PROGRESS_CHANNEL.
+    Postgres delivers it when the surrounding transaction commits, so listeners
+    never see progress for an update that was rolled back.
+    """
+    event = {"id": str(image_id), "job_id": job_id, "state": state}
+    if progress:
+        event["progress"] = progress
+    cur.execute("SELECT pg_notify(%s, %s)", (PROGRESS_CHANNEL, json.dumps(event)))
+
+
 def init_k8s():
     """Initialize Kubernetes client."""
     try:
@@ -61,41 +222,273 @@ def init_k8s():
             sys.exit(1)
 
 
-def get_pod_for_job(job_name: str, timeout: int = 30):
-    """Return the first pod name for the given Job, waiting up to timeout seconds for it to start running/finish."""
-    core_v1 = client.CoreV1Api()
-    selector = f"job-name={job_name}"
-    end = time.time() + timeout
+class QuotaBackpressure:
+    """
+    Limit new Jobs to the headroom left by the namespace's ResourceQuotas.
+    Quotas are re-read every QUOTA_REFRESH_INTERVAL seconds; Jobs started in
+    between are subtracted locally, since their pods may not be counted yet.
+    """
 
-    while time.time() < end:
+    def __init__(self):
+        # Quota resources one imagetask Job consumes
+        self.per_job = {"count/jobs.batch": Decimal(1), "pods": Decimal(1)}
+        if JOB_CPU_REQUEST:
+            self.per_job["requests.cpu"] = parse_quantity(JOB_CPU_REQUEST)
+        if JOB_MEMORY_REQUEST:
+            self.per_job["requests.memory"] = parse_quantity(JOB_MEMORY_REQUEST)
+        self.enabled = True
+        self.headroom = None
+        self.started_since_refresh = 0
+        self.refreshed_at = 0.0
+
+    def available(self):
+        """Jobs the quotas still allow, or None when nothing limits them."""
+        if not self.enabled:
+            return None
+        if time.monotonic() - self.refreshed_at >= QUOTA_REFRESH_INTERVAL:
+            self.refresh()
+        if self.headroom is None:
+            return None
+        return max(0, self.headroom - self.started_since_refresh)
+
+    def job_started(self):
+        self.started_since_refresh += 1
+
+    def refresh(self):
+        self.refreshed_at = time.monotonic()
         try:
-            pods = core_v1.list_namespaced_pod(
-                namespace=NAMESPACE, label_selector=selector
-            )
-        except Exception as e:
-            logger.warning("Failed to list pods for job", job=job_name, error=str(e))
-            time.sleep(1)
-            continue
+            quotas = client.CoreV1Api().list_namespaced_resource_quota(NAMESPACE)
+        except ApiException as e:
+            if e.status == 403:
+                logger.warning(
+                    "Not allowed to read ResourceQuotas; quota backpressure disabled"
+                )
+                self.enabled = False
+            else:
+                logger.warning(f"Failed to read ResourceQuotas: {e}")
+            return
+
+        headroom = None
+        for quota in quotas.items:
+            hard = quota.status.hard or {}
+            used = quota.status.used or {}
+            for resource, per_job in self.per_job.items():
+                if resource not in hard:
+                    continue
+                free = parse_quantity(hard[resource]) - parse_quantity(
+                    used.get(resource, "0")
+                )
+                jobs = max(0, int(free // per_job))
+                headroom = jobs if headroom is None else min(headroom, jobs)
+        self.headroom = headroom
+        self.started_since_refresh = 0
+        if headroom is not None:
+            logger.debug("Refreshed quota headroom", headroom=headroom)
+
+
+class JobTracker:
+    """
+    What the informers have seen of one imagetask Job. pod_name is set once the
+    imagetask container is running or has terminated (its logs can be read);
+    succeeded once the Job finishes.
+    """
 
-        if not pods.items:
-            time.sleep(1)
-            continue
+    def __init__(self, job_name: str):
+        self.job_name = job_name
+        self.pod_name = None
+        self.succeeded = None
+        # Exit code and termination message of the imagetask container, once
+        # it has terminated
+        self.exit_code = None
+        self.termination_message = None
+        # Outcome log records of batch items, by item id
+        self.outcomes = {}
+        # Set once the Job has been seen, so a relist can tell it was deleted
+        self.seen = False
+        self.changed = threading.Condition()
+
+
+class JobWatcher:
+    """
+    One shared list+watch on the Jobs and Pods this scheduler manages.
+    Events are dispatched to the JobTracker of the Job they belong to, so
+    API-server load doesn't grow with the number of jobs in flight.
+    """
 
-        # Prefer a pod that is Running, Succeeded or Failed
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.trackers = {}
+        # Latest Job by name and Pod by owning Job name, so a Job tracked after
+        # its first events were delivered still starts from its current state
+        self.jobs = {}
+        self.pods = {}
+
+    def start(self):
+        batch_v1 = client.BatchV1Api()
+        core_v1 = client.CoreV1Api()
+        for name, list_func, on_event, on_relist in (
+            (
+                "job-informer",
+                batch_v1.list_namespaced_job,
+                self.on_job,
+                self.on_job_relist,
+            ),
+            ("pod-informer", core_v1.list_namespaced_pod, self.on_pod, None),
+        ):
+            threading.Thread(
+                target=self.run_informer,
+                args=(list_func, on_event, on_relist),
+                name=name,
+                daemon=True,
+            ).start()
+
+    def run_informer(self, list_func, on_event, on_relist=None):
+        """List once, then watch from that resourceVersion; relist when it expires."""
+        resource_version = None
+        while True:
+            try:
+                if resource_version is None:
+                    listing = list_func(
+                        namespace=NAMESPACE, label_selector=MANAGED_BY_SELECTOR
+                    )
+                    for obj in listing.items:
+                        on_event(obj, deleted=False)
+                    if on_relist:
+                        on_relist({obj.metadata.name for obj in listing.items})
+                    resource_version = listing.metadata.resource_version
+
+                w = watch.Watch()
+                for event in w.stream(
+                    list_func,
+                    namespace=NAMESPACE,
+                    label_selector=MANAGED_BY_SELECTOR,
+                    resource_version=resource_version,
+                    timeout_seconds=WATCH_TIMEOUT,
+                ):
+                    obj = event["object"]
+                    resource_version = obj.metadata.resource_version
+                    on_event(obj, deleted=event["type"] == "DELETED")
+            except ApiException as e:
+                if e.status == 410:
+                    # Our resourceVersion is too old to resume from
+                    logger.debug("Watch expired; relisting")
+                else:
+                    logger.warning(f"Watch failed: {e}")
+                    time.sleep(1)
+                resource_version = None
+            except Exception as e:
+                logger.warning(f"Watch failed: {e}")
+                time.sleep(1)
+                resource_version = None
+
+    def track(self, job_name: str) -> JobTracker:
+        """Start dispatching events for job_name (before the Job is created)."""
+        tracker = JobTracker(job_name)
+        with self.lock:
+            self.trackers[job_name] = tracker
+            job = self.jobs.get(job_name)
+            pod = self.pods.get(job_name)
+        if job is not None:
+            self.update_from_job(tracker, job, deleted=False)
+        if pod is not None:
+            self.update_from_pod(tracker, pod)
+        return tracker
+
+    def job_names(self):
+        """(name, creation timestamp) of every managed Job currently cached."""
+        with self.lock:
+            return [
+                (name, job.metadata.creation_timestamp)
+                for name, job in self.jobs.items()
+            ]
+
+    def untrack(self, job_name: str):
+        with self.lock:
+            self.trackers.pop(job_name, None)
+
+    def on_job(self, job, deleted: bool):
+        name = job.metadata.name
+        with self.lock:
+            if deleted:
+                self.jobs.pop(name, None)
+            else:
+                self.jobs[name] = job
+            tracker = self.trackers.get(name)
+        if tracker is not None:
+            self.update_from_job(tracker, job, deleted)
+
+    def on_job_relist(self, names):
+        """Jobs deleted while the watch was down never send a DELETED event."""
+        with self.lock:
+            for name in set(self.jobs) - names:
+                del self.jobs[name]
+            missing = [
+                t for t in self.trackers.values() if t.seen and t.job_name not in names
+            ]
+        for tracker in missing:
+            self.finish(tracker, False)
+
+    def on_pod(self, pod, deleted: bool):
+        labels = pod.metadata.labels or {}
+        job_name = labels.get("job-name")
+        if not job_name:
+            return
+        with self.lock:
+            if deleted:
+                self.pods.pop(job_name, None)
+            else:
+                self.pods[job_name] = pod
+            tracker = self.trackers.get(job_name)
+        if tracker is not None and not deleted:
+            self.update_from_pod(tracker, pod)
+
+    def update_from_job(self, tracker: JobTracker, job, deleted: bool):
+        tracker.seen = True
+        status = job.status
+        if status and status.succeeded:
+            self.finish(tracker, True)
+        elif (status and status.failed) or deleted:
+            self.finish(tracker, False)
+
+    def update_from_pod(self, tracker: JobTracker, pod):
+        for st in pod.status.container_statuses or []:
+            if st.name != "imagetask":
+                continue
+            # If container is running or has terminated, we can read logs
+            if st.state.running is not None or st.state.terminated is not None:
+                with tracker.changed:
+                    tracker.pod_name = pod.metadata.name
+                    if st.state.terminated is not None:
+                        tracker.exit_code = st.state.terminated.exit_code
+                        tracker.termination_message = st.state.terminated.message
+                    tracker.changed.notify_all()
+            elif st.state.waiting is not None:
+                logger.debug(
+                    "Container waiting",
+                    pod=pod.metadata.name,
+                    reason=st.state.waiting.reason or "waiting",
+                )
+
+    def read_pods(self, tracker: JobTracker):
+        """Read the pods of tracker's Job from the API server, if their events lag."""
+        try:
+            pods = client.CoreV1Api().list_namespaced_pod(
+                namespace=NAMESPACE, label_selector=f"job-name={tracker.job_name}"
+            )
+        except ApiException as e:
+            logger.warning(f"Failed to read pods: {e}", job_name=tracker.job_name)
+            return
         for pod in pods.items:
-            phase = (pod.status.phase or "").capitalize()
-            if phase in {"Running", "Succeeded", "Failed"}:
-                return pod.metadata.name
-
-        # If we have pods but none are ready yet, keep waiting
-        logger.debug(
-            "Pod exists but not ready yet",
-            job=job_name,
-            pods=[p.metadata.name for p in pods.items],
-        )
-        time.sleep(1)
+            self.update_from_pod(tracker, pod)
+
+    def finish(self, tracker: JobTracker, succeeded: bool):
+        with tracker.changed:
+            if tracker.succeeded is None:
+                tracker.succeeded = succeeded
+            tracker.changed.notify_all()
 
-    return None
+
+job_watcher = JobWatcher()
 
 
 def stream_pod_logs_and_report_progress(
@@ -104,68 +497,18 @@ def stream_pod_logs_and_report_progress(
     on_progress=None,
     stop_event: threading.Event = None,
     wait_timeout: int = 60,
+    on_outcome=None,
 ):
     """
-    Stream logs from the given pod, parse JSON loguru lines, and invoke on_progress(progress, payload).
-    Waits for the container to be Running/Terminated before attempting to stream logs and retries
+    Stream logs from the given pod, parse JSON loguru lines, and invoke on_progress(progress, item)
+    (item is the batch item id the line was logged for, if any), and on_outcome(item, extra)
+    for the outcome record the batch command logs per item.
+    Called once the informer has seen the container Running/Terminated; still retries
     gracefully if the API responds with a "container is waiting to start" 400.
     """
     core_v1 = client.CoreV1Api()
     w = watch.Watch()
 
-    def _container_ready(pname):
-        end = time.time() + wait_timeout
-        while time.time() < end:
-            try:
-                pod = core_v1.read_namespaced_pod(name=pname, namespace=NAMESPACE)
-            except ApiException as e:
-                logger.debug(
-                    "Failed to read pod status while waiting for container",
-                    pod=pname,
-                    error=str(e),
-                )
-                time.sleep(1)
-                continue
-            except Exception as e:
-                logger.debug("Unexpected error reading pod", pod=pname, error=str(e))
-                time.sleep(1)
-                continue
-
-            statuses = pod.status.container_statuses or []
-            for st in statuses:
-                if st.name != container:
-                    continue
-                # If container is running or has terminated, we can read logs
-                if (
-                    getattr(st.state, "running", None) is not None
-                    or getattr(st.state, "terminated", None) is not None
-                ):
-                    return True
-                # If waiting, log the reason (useful for diagnostics)
-                if getattr(st.state, "waiting", None) is not None:
-                    reason = (
-                        st.state.waiting.reason
-                        if st.state.waiting.reason
-                        else "waiting"
-                    )
-                    logger.debug(
-                        "Container waiting",
-                        pod=pname,
-                        container=container,
-                        reason=reason,
-                    )
-            time.sleep(1)
-        return False
-
-    # Wait for container readiness before attempting to stream logs
-    ready = _container_ready(pod_name)
-    if not ready:
-        logger.info(
-            "Container not ready to stream logs; will still attempt streaming with retries",
-            pod=pod_name,
-            container=container,
-        )
-
     # Try streaming, but tolerate transient 400 "ContainerCreating" errors by retrying.
     retry_delay = 1
     max_retries = max(3, int(wait_timeout / 5))
@@ -180,8 +523,9 @@ def stream_pod_logs_and_report_progress(
                     namespace=NAMESPACE,
                     container=container,
                     follow=True,
+                    # From the start: batch outcome records logged before the
+                    # stream attached are needed too
                     _preload_content=False,
-                    tail_lines=10,
                 ):
                     if stop_event and stop_event.is_set():
                         w.stop()
@@ -202,11 +546,8 @@ def stream_pod_logs_and_report_progress(
                             # Not JSON; skip
                             continue
 
-                        progress = (
-                            payload.get("record", {})
-                            .get("extra", {})
-                            .get("progress", {})
-                        )
+                        extra = payload.get("record", {}).get("extra", {})
+                        progress = extra.get("progress", {})
 
                         logger.debug(
                             "Pod log line",
@@ -215,9 +556,12 @@ def stream_pod_logs_and_report_progress(
                             progress=progress,
                         )
 
+                        if extra.get("outcome") and on_outcome:
+                            on_outcome(extra.get("item"), extra)
+
                         if progress and on_progress:
                             try:
-                                on_progress(progress)
+                                on_progress(progress, extra.get("item"))
                             except Exception as callback_err:
                                 logger.warning(
                                     "Progress callback failed",
@@ -275,121 +619,478 @@ def stream_pod_logs_and_report_progress(
             pass
 
 
-def update_image_job_progress(image_id: str, job_id: str, progress, payload=None):
-    """Persist progress into the job column for visibility."""
-    conn = get_db_connection()
-    cur = conn.cursor()
+class ProgressAggregator:
+    """
+    Coalesce job progress from the log streams and persist it in batches.
+    Only the latest progress of each image is kept; a background thread writes
+    everything pending every PROGRESS_FLUSH_INTERVAL seconds in one
+    UPDATE ... FROM (VALUES ...) over a pooled connection, and finish() writes an
+    image's last progress before its job is marked completed or failed.
+    """
 
-    job_status = {
-        "acquired": True,
-        "job_id": job_id,
-        "progress": progress,
-        "last_progress_at": datetime.utcnow().isoformat(),
-    }
-    if payload:
-        job_status["last_progress_payload"] = payload
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Only one flush at a time, so writes for an image stay in order
+        self.flush_lock = threading.Lock()
+        self.pending = {}
+        self.pool = None
+
+    def start(self):
+        # Connections are opened on first use
+        self.pool = ThreadedConnectionPool(
+            0,
+            2,
+            host=DB_HOST,
+            port=DB_PORT,
+            dbname=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+        )
+        threading.Thread(target=self.run, name="progress", daemon=True).start()
 
+    def run(self):
+        while True:
+            time.sleep(PROGRESS_FLUSH_INTERVAL)
+            self.flush()
+
+    def submit(self, image_id: str, job_id: str, progress):
+        """Record the latest progress of an image; replaces any unwritten one."""
+        with self.lock:
+            self.pending[image_id] = (
+                job_id,
+                json.dumps(progress),
+                datetime.utcnow().isoformat(),
+            )
+
+    def finish(self, image_id: str):
+        """Write the image's final progress now, if any is still pending."""
+        with self.lock:
+            if image_id not in self.pending:
+                return
+        self.flush()
+
+    def flush(self):
+        with self.flush_lock:
+            with self.lock:
+                pending, self.pending = self.pending, {}
+            if not pending:
+                return
+            rows = [(image_id, *update) for image_id, update in pending.items()]
+
+            conn = None
+            try:
+                conn = self.pool.getconn()
+                with conn, conn.cursor() as cur:
+                    # Merge into the job JSON (keeping started_at etc.), and only
+                    # while the job is still the current, unfinished attempt
+                    execute_values(
+                        cur,
+                        f"""
+                        WITH updated AS (
+                            UPDATE images
+                            SET job = images.job || jsonb_build_object(
+                                    'progress', v.progress::jsonb,
+                                    'last_progress_at', v.progress_at
+                                ),
+                                updated_at = CURRENT_TIMESTAMP
+                            FROM (VALUES %s) AS v(id, job_id, progress, progress_at)
+                            WHERE images.id = v.id::uuid
+                              AND images.job->>'job_id' = v.job_id
+                              AND images.job->>'acquired' = 'true'
+                            RETURNING images.id, v.job_id, v.progress
+                        )
+                        SELECT pg_notify('{PROGRESS_CHANNEL}', json_build_object(
+                            'id', id,
+                            'job_id', job_id,
+                            'state', 'acquired',
+                            'progress', progress::jsonb
+                        )::text)
+                        FROM updated
+                        """,
+                        rows,
+                    )
+                self.pool.putconn(conn)
+                logger.debug("Flushed job progress", images=len(rows))
+            except Exception as e:
+                # Don't reuse a connection in an unknown state
+                if conn is not None:
+                    self.pool.putconn(conn, close=True)
+                logger.warning(f"Failed to update progress: {e}", images=len(rows))
+                # Retry with the next flush, unless newer progress arrived meanwhile
+                with self.lock:
+                    for image_id, update in pending.items():
+                        self.pending.setdefault(image_id, update)
+
+
+progress_aggregator = ProgressAggregator()
+
+
+def acquire_image_jobs(limit: int):
+    """
+    Atomically claim up to limit images that need processing, in one round trip.
+    Pending rows are taken by priority, then oldest first, from the partial
+    images_pending_idx index, skipping rows still backing off from a failed
+    attempt; FOR UPDATE SKIP LOCKED keeps concurrent schedulers from claiming the
+    same rows. Each claimed row is leased to this scheduler (see LeaseKeeper).
+    No image bytes are read here (see load_image_data).
+    Returns a list of (image_id, job_id, blob_key, has_inline_data).
+    """
+    conn = get_db_connection()
+    cur = conn.cursor()
     try:
         cur.execute(
             """
-            UPDATE images
-            SET job = %s
-            WHERE id = %s
+            WITH claimed AS (
+                UPDATE images
+                SET job = jsonb_build_object(
+                        'acquired', true,
+                        'job_id', gen_random_uuid()::text,
+                        'started_at', %s::text,
+                        'attempt', images.attempts + 1
+                    ),
+                    lease_owner = %s,
+                    lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s),
+                    attempts = attempts + 1,
+                    next_attempt_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM (
+                    SELECT id FROM images
+                    WHERE job IS NULL
+                      AND (next_attempt_at IS NULL OR next_attempt_at <= CURRENT_TIMESTAMP)
+                    ORDER BY priority DESC, created_at
+                    LIMIT %s
+                    FOR UPDATE SKIP LOCKED
+                ) pending
+                WHERE images.id = pending.id
+                RETURNING images.id, images.job->>'job_id' AS job_id,
+                    images.blob_key, images.data IS NOT NULL AS has_inline_data
+            )
+            SELECT id, job_id, blob_key, has_inline_data,
+                pg_notify(%s, json_build_object(
+                    'id', id, 'job_id', job_id, 'state', 'acquired'
+                )::text)
+            FROM claimed
             """,
-            (json.dumps(job_status), image_id),
+            (
+                datetime.utcnow().isoformat(),
+                SCHEDULER_ID,
+                LEASE_TTL,
+                limit,
+                PROGRESS_CHANNEL,
+            ),
         )
+        rows = cur.fetchall()
         conn.commit()
-        logger.info(f"Updated image job progress", image_id=image_id, progress=progress)
     except Exception as e:
         conn.rollback()
-        logger.warning(f"Failed to update progress: {e}", image_id=image_id)
+        logger.error(f"Failed to acquire image jobs: {e}")
+        return []
     finally:
         cur.close()
         conn.close()
 
+    for image_id, job_id, _, _ in rows:
+        logger.info(
+            f"Acquired image for processing", image_id=str(image_id), job_id=job_id
+        )
+    return [(str(row[0]), row[1], row[2], row[3]) for row in rows]
+
 
-def acquire_image_job():
+def load_image_data(image_id: str, job_id: str, blob_key: str, has_inline_data: bool):
     """
-    Atomically acquire an image that needs processing.
-    Uses FOR UPDATE SKIP LOCKED for safe concurrent access by multiple schedulers.
-    Returns (image_id, image_data) or (None, None) if no work available.
+    Read a claimed image's bytes, after the claiming transaction has committed.
+    Rows not yet moved by migrate_blobs.py still carry their bytes in `data`.
+    Marks the job failed and returns None if they can't be read.
     """
-    conn = get_db_connection()
-    cur = conn.cursor()
     try:
-        # Start transaction
-        cur.execute("BEGIN")
-
-        # Find and lock one image with NULL job, skipping locked rows
-        cur.execute(
-            """
-            SELECT id, data FROM images
-            WHERE job IS NULL
-            ORDER BY RANDOM()
-            LIMIT 1
-            FOR UPDATE SKIP LOCKED
-            """
+        if has_inline_data:
+            conn = get_db_connection()
+            try:
+                with conn.cursor() as cur:
+                    cur.execute("SELECT data FROM images WHERE id = %s", (image_id,))
+                    return bytes(cur.fetchone()[0])
+            finally:
+                conn.close()
+        return blob_store.get(blob_key)
+    except Exception as e:
+        logger.error(f"Failed to read image blob: {e}", image_id=image_id)
+        update_image_job_status(
+            image_id, job_id, success=False, error="Image blob missing"
         )
-        row = cur.fetchone()
+        return None
+
+
+class LeaseKeeper:
+    """
+    Heartbeat for the leases this scheduler holds, plus the reaper for everyone's.
+    If a scheduler dies mid-job its leases stop being renewed; whichever scheduler
+    gets the reaper lock then re-queues those images (with exponential backoff,
+    up to MAX_ATTEMPTS) and deletes the Jobs and shared files they left behind.
+    """
+
+    def __init__(self):
+        self.reaped_at = 0.0
+        # Images of the jobs in flight; only their leases are renewed, so an
+        # image whose job died without a final status still expires
+        self.lock = threading.Lock()
+        self.held = set()
+
+    def start(self):
+        threading.Thread(target=self.run, name="lease-keeper", daemon=True).start()
 
-        if row is None:
-            conn.rollback()
-            return None, None
+    def hold(self, image_ids):
+        with self.lock:
+            self.held.update(image_ids)
 
-        image_id, image_data = row
-        job_id = str(uuid.uuid4())
+    def release(self, image_ids):
+        with self.lock:
+            self.held.difference_update(image_ids)
 
-        # Atomically mark as acquired
+    def run(self):
+        while True:
+            try:
+                self.heartbeat()
+                if time.monotonic() - self.reaped_at >= REAPER_INTERVAL:
+                    self.reaped_at = time.monotonic()
+                    self.reap()
+            except Exception as e:
+                logger.warning(f"Lease maintenance failed: {e}")
+            time.sleep(LEASE_TTL / 3)
+
+    def heartbeat(self):
+        """Renew the leases of the jobs in flight, in one statement."""
+        with self.lock:
+            held = list(self.held)
+        if not held:
+            return
+        conn = get_db_connection()
+        try:
+            with conn, conn.cursor() as cur:
+                cur.execute(
+                    """
+                    UPDATE images
+                    SET lease_expires_at = CURRENT_TIMESTAMP + make_interval(secs => %s)
+                    WHERE lease_owner = %s AND id = ANY(%s::uuid[])
+                    """,
+                    (LEASE_TTL, SCHEDULER_ID, held),
+                )
+        finally:
+            conn.close()
+
+    def reap(self):
+        conn = get_db_connection()
+        try:
+            with conn, conn.cursor() as cur:
+                # Transaction-scoped, so it is released with the commit
+                cur.execute("SELECT pg_try_advisory_xact_lock(%s)", (REAPER_LOCK_ID,))
+                if not cur.fetchone()[0]:
+                    return
+                expired_jobs = self.requeue_expired(cur)
+                cur.execute(
+                    """
+                    SELECT job->>'job_id', job->>'k8s_job' FROM images
+                    WHERE lease_expires_at IS NOT NULL
+                    """
+                )
+                rows = cur.fetchall()
+        finally:
+            conn.close()
+
+        # A batch Job holds several leases; delete it once
+        for job_name in expired_jobs:
+            delete_k8s_job(job_name)
+        self.remove_orphans(
+            leased={row[0] for row in rows},
+            leased_jobs={row[1] for row in rows if row[1]},
+        )
+
+    def requeue_expired(self, cur):
+        """Release expired leases; returns the names of the Jobs running them."""
         cur.execute(
             """
-            UPDATE images
-            SET job = %s
-            WHERE id = %s
+            WITH reaped AS (
+                UPDATE images
+                SET job = CASE WHEN images.attempts >= %(max_attempts)s
+                        THEN jsonb_build_object(
+                            'failed', true,
+                            'job_id', expired.job_id,
+                            'failed_at', %(now)s::text,
+                            'error', 'Lease expired ' || images.attempts || ' times'
+                        )
+                    END,
+                    next_attempt_at = CASE WHEN images.attempts < %(max_attempts)s
+                        THEN CURRENT_TIMESTAMP + make_interval(secs => LEAST(
+                            %(backoff)s * 2 ^ (images.attempts - 1), %(backoff_max)s
+                        ))
+                    END,
+                    last_error = 'Lease expired',
+                    lease_owner = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                FROM (
+                    SELECT id, job->>'job_id' AS job_id, job->>'k8s_job' AS k8s_job
+                    FROM images
+                    WHERE lease_expires_at < CURRENT_TIMESTAMP
+                    FOR UPDATE SKIP LOCKED
+                ) expired
+                WHERE images.id = expired.id
+                RETURNING images.id, expired.job_id, expired.k8s_job,
+                    images.job IS NULL AS requeued
+            )
+            SELECT id, job_id, k8s_job, requeued,
+                pg_notify(%(channel)s, json_build_object(
+                    'id', id,
+                    'job_id', job_id,
+                    'state', CASE WHEN requeued THEN 'pending' ELSE 'failed' END
+                )::text)
+            FROM reaped
             """,
-            (
-                f'{{"acquired": true, "job_id": "{job_id}", "started_at": "{datetime.utcnow().isoformat()}"}}',
-                image_id,
-            ),
+            {
+                "max_attempts": MAX_ATTEMPTS,
+                "now": datetime.utcnow().isoformat(),
+                "backoff": RETRY_BACKOFF,
+                "backoff_max": RETRY_BACKOFF_MAX,
+                "channel": PROGRESS_CHANNEL,
+            },
         )
-        conn.commit()
+        rows = cur.fetchall()
+        for image_id, job_id, _, requeued, _ in rows:
+            logger.warning(
+                (
+                    "Lease expired; image re-queued"
+                    if requeued
+                    else "Lease expired; image failed"
+                ),
+                image_id=str(image_id),
+                job_id=job_id,
+            )
+        return {row[2] for row in rows if row[2]}
+
+    def remove_orphans(self, leased, leased_jobs):
+        """
+        Delete imagetask Jobs and shared files whose job no longer holds a lease
+        (left behind by a scheduler that died, or that lost its lease). leased
+        are the job ids holding one and leased_jobs the Jobs they run in. Anything
+        younger than LEASE_TTL is left alone, since its claim may not be visible yet.
+        """
+        leased_names = leased_jobs | {
+            job_name_for(job_id) for job_id in leased if job_id
+        }
+        cutoff = time.time() - LEASE_TTL
+        for job_name, created_at in job_watcher.job_names():
+            if job_name in leased_names or created_at is None:
+                continue
+            if created_at.timestamp() < cutoff:
+                logger.info("Deleting orphaned Job", job_name=job_name)
+                delete_k8s_job(job_name)
 
-        logger.info(
-            f"Acquired image for processing", image_id=str(image_id), job_id=job_id
-        )
-        return str(image_id), image_data, job_id
+        shared_path = Path(SHARED_VOLUME_PATH)
+        shared_files = [
+            path
+            for pattern in ("*-input.jpg", "*-output.jpg", "*-manifest.json")
+            for path in shared_path.glob(pattern)
+        ]
+        for path in shared_files:
+            job_id = path.name.rsplit("-", 1)[0]
+            if job_id in leased:
+                continue
+            try:
+                if path.stat().st_mtime < cutoff:
+                    logger.info("Deleting orphaned shared file", path=str(path))
+                    path.unlink()
+            except FileNotFoundError:
+                pass
 
-    except Exception as e:
-        conn.rollback()
-        logger.error(f"Failed to acquire image job: {e}")
-        return None, None, None
+
+lease_keeper = LeaseKeeper()
+
+
+def job_name_for(job_id: str) -> str:
+    return f"imagetask-{job_id[:8]}"
+
+
+def record_k8s_job(image_ids, job_name: str):
+    """
+    Store the name of the Job running image_ids with their claims, before it is
+    created, so the reaper can delete a batch Job once whichever lease expires.
+    """
+    conn = get_db_connection()
+    try:
+        with conn, conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE images SET job = job || jsonb_build_object('k8s_job', %s)
+                WHERE id = ANY(%s::uuid[]) AND lease_owner = %s
+                """,
+                (job_name, list(image_ids), SCHEDULER_ID),
+            )
     finally:
-        cur.close()
         conn.close()
 
 
-def create_k8s_job(image_id: str, job_id: str, input_path: str, output_path: str):
+def create_k8s_job(image_id: str, job_id: str, args: list):
     """
-    Create a Kubernetes Job to process the image.
+    Create a Kubernetes Job running the imagetask CLI with args.
+    image_id and job_id (of the first image, for a batch) name and label it.
     """
     batch_v1 = client.BatchV1Api()
 
-    job_name = f"imagetask-{job_id[:8]}"
+    job_name = job_name_for(job_id)
+
+    requests = {}
+    if JOB_CPU_REQUEST:
+        requests["cpu"] = JOB_CPU_REQUEST
+    if JOB_MEMORY_REQUEST:
+        requests["memory"] = JOB_MEMORY_REQUEST
+
+    env = [
+        client.V1EnvVar(name=name, value=os.environ[name])
+        for name in IMAGE_TASK_OPTIONS
+        if os.environ.get(name)
+    ]
+    env_from = []
+    if TRANSPORT == "blob":
+        # The imagetask reads and writes the blob store itself
+        env += [
+            client.V1EnvVar(name=name, value=value)
+            for name, value in (
+                ("BLOB_STORE_BACKEND", BLOB_STORE_BACKEND),
+                ("BLOB_STORE_PATH", BLOB_STORE_PATH),
+                ("BLOB_STORE_S3_BUCKET", BLOB_STORE_S3_BUCKET),
+                ("BLOB_STORE_S3_ENDPOINT", BLOB_STORE_S3_ENDPOINT),
+            )
+            if value
+        ]
+        if BLOB_STORE_SECRET:
+            env_from = [
+                client.V1EnvFromSource(
+                    secret_ref=client.V1SecretEnvSource(name=BLOB_STORE_SECRET)
+                )
+            ]
+        volume_name, mount_path, claim_name = "blobs", BLOB_STORE_PATH, BLOBS_PVC_NAME
+    else:
+        volume_name, mount_path, claim_name = (
+            "shared-data",
+            "/app/shared",
+            SHARED_PVC_NAME,
+        )
+    # An s3 blob store needs no volume at all
+    use_volume = not (TRANSPORT == "blob" and BLOB_STORE_BACKEND == "s3")
 
     # Container specification
     container = client.V1Container(
         name="imagetask",
         image=IMAGE_TASK_IMAGE,
         image_pull_policy="IfNotPresent",
-        args=[
-            f"--input-path={input_path}",
-            f"--output-path={output_path}",
-        ],
-        volume_mounts=[
-            client.V1VolumeMount(
-                name="shared-data",
-                mount_path="/app/shared",
-            )
-        ],
+        resources=client.V1ResourceRequirements(requests=requests or None),
+        args=args,
+        env=env or None,
+        env_from=env_from or None,
+        volume_mounts=(
+            [client.V1VolumeMount(name=volume_name, mount_path=mount_path)]
+            if use_volume
+            else None
+        ),
     )
 
     # Pod template
@@ -401,19 +1102,25 @@ def create_k8s_job(image_id: str, job_id: str, input_path: str, output_path: str
                 "app.kubernetes.io/part-of": "imagomortis",
                 "imagomortis/image-id": image_id[:8],
                 "imagomortis/job-id": job_id[:8],
+                # Selects the pod for job_watcher's informer
+                "app.kubernetes.io/managed-by": "scheduler",
             }
         ),
         spec=client.V1PodSpec(
             restart_policy="Never",
             containers=[container],
-            volumes=[
-                client.V1Volume(
-                    name="shared-data",
-                    persistent_volume_claim=client.V1PersistentVolumeClaimVolumeSource(
-                        claim_name="scheduler-shared-pvc"
-                    ),
-                )
-            ],
+            volumes=(
+                [
+                    client.V1Volume(
+                        name=volume_name,
+                        persistent_volume_claim=client.V1PersistentVolumeClaimVolumeSource(
+                            claim_name=claim_name
+                        ),
+                    )
+                ]
+                if use_volume
+                else None
+            ),
         ),
     )
 
@@ -450,39 +1157,53 @@ def create_k8s_job(image_id: str, job_id: str, input_path: str, output_path: str
         raise
 
 
-def wait_for_job_completion(job_name: str, image_id: str = None, job_id: str = None):
+def wait_for_job_completion(tracker: JobTracker, images: dict = None):
     """
     Wait for a Kubernetes Job to complete (success or failure) while streaming progress logs.
+    images maps the image ids the Job processes to their job ids; progress is
+    matched to an image by the batch item it was logged for.
+    Both waits are on events from job_watcher; nothing here polls the API server.
     Returns True if succeeded, False if failed.
     """
-    batch_v1 = client.BatchV1Api()
-
+    images = images or {}
+    job_name = tracker.job_name
     logger.info(f"Waiting for job completion", job_name=job_name)
 
-    # Try to locate the pod and stream progress logs in the background
-    pod_name = get_pod_for_job(job_name)
+    # Stream progress logs in the background once the container can serve them
+    with tracker.changed:
+        tracker.changed.wait_for(
+            lambda: tracker.pod_name is not None or tracker.succeeded is not None
+        )
+        pod_name = tracker.pod_name
     stop_event = threading.Event()
     stream_thread = None
 
     if pod_name:
 
-        def _on_progress(progress_dict):
-            logger.info(
+        def _on_progress(progress_dict, item=None):
+            logger.debug(
                 "Progress update",
                 job_name=job_name,
                 pod=pod_name,
+                item=item,
                 progress=progress_dict,
             )
-            logger.warning(
-                "Updating image job progress", image_id=image_id, job_id=job_id
-            )
-            if image_id and job_id:
-                update_image_job_progress(image_id, job_id, progress_dict)
+            if item is None and len(images) == 1:
+                item = next(iter(images))
+            if item in images:
+                progress_aggregator.submit(item, images[item], progress_dict)
+
+        def _on_outcome(item, record):
+            tracker.outcomes[item] = record
 
         stream_thread = threading.Thread(
             target=stream_pod_logs_and_report_progress,
             args=(pod_name,),
-            kwargs={"on_progress": _on_progress, "stop_event": stop_event},
+            kwargs={
+                "on_progress": _on_progress,
+                "on_outcome": _on_outcome,
+                "stop_event": stop_event,
+            },
             daemon=True,
         )
         stream_thread.start()
@@ -490,28 +1211,102 @@ def wait_for_job_completion(job_name: str, image_id: str = None, job_id: str = N
         logger.info("Pod not found for job; skipping log streaming", job_name=job_name)
 
     try:
-        while True:
-            try:
-                job = batch_v1.read_namespaced_job(name=job_name, namespace=NAMESPACE)
-
-                if job.status.succeeded is not None and job.status.succeeded > 0:
-                    logger.info(f"Job completed successfully", job_name=job_name)
-                    return True
-
-                if job.status.failed is not None and job.status.failed > 0:
-                    logger.warning(f"Job failed", job_name=job_name)
-                    return False
-
-                # Still running, wait and poll again
-                time.sleep(2)
-
-            except ApiException as e:
-                logger.error(f"Failed to check job status: {e}", job_name=job_name)
-                return False
+        with tracker.changed:
+            tracker.changed.wait_for(lambda: tracker.succeeded is not None)
+            # In blob transport the outputs are only in the pod's final status,
+            # so wait for it even if the pod's events haven't arrived at all
+            if tracker.pod_name is not None or TRANSPORT == "blob":
+                tracker.changed.wait_for(
+                    lambda: tracker.exit_code is not None, timeout=POD_STATUS_GRACE
+                )
+        if tracker.exit_code is None and TRANSPORT == "blob":
+            job_watcher.read_pods(tracker)
+        if tracker.succeeded:
+            logger.info(f"Job completed successfully", job_name=job_name)
+        else:
+            logger.warning(f"Job failed", job_name=job_name)
+        return tracker.succeeded
     finally:
         stop_event.set()
         if stream_thread:
             stream_thread.join(timeout=5)
+        # The last progress lands before the job's final status is written
+        for image_id in images:
+            progress_aggregator.finish(image_id)
+
+
+def job_outputs(tracker: JobTracker) -> dict:
+    """
+    Where a finished imagetask Job put its outputs, by batch item id (None for
+    process-image): from its termination message or, for a batch whose message
+    was too long to keep, from the outcomes it logged.
+    """
+    outputs = {
+        item: record.get("output")
+        for item, record in tracker.outcomes.items()
+        if record.get("outcome") == "succeeded"
+    }
+    try:
+        message = json.loads(tracker.termination_message or "{}")
+    except ValueError:
+        # Truncated by Kubernetes
+        message = {}
+    if "output" in message:
+        outputs[None] = message["output"]
+    outputs.update(message.get("outputs", {}))
+    return outputs
+
+
+def run_on_worker(image_id: str, job_id: str, input_path: str, output_path: str):
+    """
+    Process an image on the imagetask worker pool, relaying its progress.
+    Retries while every worker is busy, for up to WORKER_TIMEOUT seconds.
+    Returns (succeeded, transient, output): whether it failed in a way a retry
+    may fix, and where the worker put the output.
+    """
+    body = json.dumps({"input_path": input_path, "output_path": output_path})
+    deadline = time.monotonic() + WORKER_TIMEOUT
+    retry_delay = 0.1
+
+    while True:
+        request = urllib.request.Request(
+            f"{WORKER_URL}/process",
+            data=body.encode(),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=WORKER_TIMEOUT) as response:
+                result = None
+                for line in response:
+                    message = json.loads(line)
+                    if "progress" in message:
+                        progress = message["progress"]
+                        progress_aggregator.submit(image_id, job_id, progress)
+                    else:
+                        result = message
+            break
+        except urllib.error.HTTPError as e:
+            if e.code != 503 or time.monotonic() >= deadline:
+                logger.warning(f"Worker request failed: {e}", image_id=image_id)
+                return False, True, None
+        except (urllib.error.URLError, ConnectionError) as e:
+            if time.monotonic() >= deadline:
+                logger.warning(f"Worker unreachable: {e}", image_id=image_id)
+                return False, True, None
+        # Busy or (re)starting: try again, possibly on another worker
+        time.sleep(retry_delay)
+        retry_delay = min(retry_delay * 2, 2)
+
+    progress_aggregator.finish(image_id)
+    if result is None or result.get("status") != "succeeded":
+        logger.warning(
+            "Worker failed to process image",
+            image_id=image_id,
+            error=(result or {}).get("error", "no result"),
+        )
+        return False, (result or {}).get("transient", True), None
+    return True, False, result.get("output")
 
 
 def delete_k8s_job(job_name: str):
@@ -531,7 +1326,7 @@ def delete_k8s_job(job_name: str):
         logger.info(f"Deleted Kubernetes Job", job_name=job_name)
     except ApiException as e:
         if e.status == 404:
-            logger.warning(f"Job already deleted", job_name=job_name)
+            logger.debug(f"Job already deleted", job_name=job_name)
         else:
             logger.error(f"Failed to delete job: {e}", job_name=job_name)
 
@@ -542,42 +1337,115 @@ def update_image_job_status(
     success: bool,
     output_data: bytes = None,
     error: str = None,
+    transient: bool = False,
+    output_key: str = None,
 ):
     """
     Update the image's job status in the database.
-    If successful and output_data is provided, update the image data.
+    If successful and output_data is provided, store it and point the image at it;
+    output_key points it at a blob the imagetask already stored instead.
+    A transient failure puts the image back in the queue after a backoff, until
+    it has had MAX_ATTEMPTS attempts; other failures are final.
+    Releases the lease; does nothing if the lease was lost and the image has
+    been re-queued under another job_id meanwhile.
     """
+    # Free-form (exception, cv2 or worker) text; Postgres text and jsonb can't
+    # hold NUL characters
+    error = (error or "Unknown error").replace("\x00", "")
+    blob_key = output_key
+    if success and output_data and blob_key is None:
+        # Write the blob before touching the row so the reference is never dangling
+        blob_key = blob_store.put(output_data)
+
     conn = get_db_connection()
     cur = conn.cursor()
 
     try:
-        if success and output_data:
+        if success and blob_key:
             # Update with new processed image data
-            job_status = f'{{"completed": true, "job_id": "{job_id}", "completed_at": "{datetime.utcnow().isoformat()}"}}'
-            cur.execute(
-                """
-                UPDATE images
-                SET data = %s, job = %s
-                WHERE id = %s
-                """,
-                (output_data, job_status, image_id),
+            job_status = json.dumps(
+                {
+                    "completed": True,
+                    "job_id": job_id,
+                    "completed_at": datetime.utcnow().isoformat(),
+                }
             )
-            logger.info(f"Updated image with processed data", image_id=image_id)
-        else:
-            # Mark as failed
-            error_msg = error.replace('"', '\\"') if error else "Unknown error"
-            job_status = f'{{"failed": true, "job_id": "{job_id}", "failed_at": "{datetime.utcnow().isoformat()}", "error": "{error_msg}"}}'
             cur.execute(
                 """
                 UPDATE images
-                SET job = %s
-                WHERE id = %s
+                SET blob_key = %s, data = NULL, job = %s,
+                    lease_owner = NULL, lease_expires_at = NULL,
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE id = %s AND job->>'job_id' = %s
                 """,
-                (job_status, image_id),
-            )
-            logger.warning(
-                f"Marked image job as failed", image_id=image_id, error=error
+                (blob_key, job_status, image_id, job_id),
             )
+            if cur.rowcount > 0:
+                notify_job_event(cur, image_id, job_id, "completed")
+                logger.info(f"Updated image with processed data", image_id=image_id)
+            else:
+                logger.warning(
+                    f"Lease lost; discarding job result", image_id=image_id
+                )
+        else:
+            requeued = False
+            if transient:
+                cur.execute(
+                    """
+                    UPDATE images
+                    SET job = NULL, last_error = %s,
+                        next_attempt_at = CURRENT_TIMESTAMP
+                            + make_interval(secs => LEAST(%s * 2 ^ (attempts - 1), %s)),
+                        lease_owner = NULL, lease_expires_at = NULL,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s AND job->>'job_id' = %s AND attempts < %s
+                    """,
+                    (
+                        error,
+                        RETRY_BACKOFF,
+                        RETRY_BACKOFF_MAX,
+                        image_id,
+                        job_id,
+                        MAX_ATTEMPTS,
+                    ),
+                )
+                requeued = cur.rowcount > 0
+            if requeued:
+                notify_job_event(cur, image_id, job_id, "pending")
+                logger.warning(
+                    f"Image job failed; will retry", image_id=image_id, error=error
+                )
+            else:
+                # Mark as failed
+                job_status = json.dumps(
+                    {
+                        "failed": True,
+                        "job_id": job_id,
+                        "failed_at": datetime.utcnow().isoformat(),
+                        "error": error,
+                    }
+                )
+                cur.execute(
+                    """
+                    UPDATE images
+                    SET job = %s::jsonb || jsonb_build_object('attempts', attempts),
+                        last_error = %s, lease_owner = NULL, lease_expires_at = NULL,
+                        updated_at = CURRENT_TIMESTAMP
+                    WHERE id = %s AND job->>'job_id' = %s
+                    """,
+                    (job_status, error, image_id, job_id),
+                )
+                if cur.rowcount > 0:
+                    notify_job_event(cur, image_id, job_id, "failed")
+                    logger.warning(
+                        f"Marked image job as failed", image_id=image_id, error=error
+                    )
+                else:
+                    logger.warning(
+                        f"Lease lost; discarding job failure",
+                        image_id=image_id,
+                        error=error,
+                    )
 
         conn.commit()
     except Exception as e:
@@ -588,76 +1456,194 @@ def update_image_job_status(
         conn.close()
 
 
-def process_image(image_id: str, image_data: bytes, job_id: str):
+def process_images(items):
     """
-    Process a single image:
-    1. Save image to shared volume
-    2. Create K8s Job
+    Process claimed images as one unit:
+    1. Read each image and save it to the shared volume (in blob transport,
+       only images whose bytes are still inline are stored, in the blob store)
+    2. Create one K8s Job for all of them (or, in pool mode, send each to a worker)
     3. Wait for completion
-    4. Read output and update DB
+    4. Read each output (or its blob key) and update DB
     5. Cleanup
+    items is a list of (image_id, job_id, blob_key, has_inline_data). More than
+    one image runs as a single imagetask `batch` Job over a manifest.
     """
     # Ensure shared volume directory exists
     shared_path = Path(SHARED_VOLUME_PATH)
     shared_path.mkdir(parents=True, exist_ok=True)
 
     # Create unique input/output paths
-    input_filename = f"{job_id}-input.jpg"
-    output_filename = f"{job_id}-output.jpg"
-    input_path = shared_path / input_filename
-    output_path = shared_path / output_filename
+    paths = {
+        image_id: (
+            shared_path / f"{job_id}-input.jpg",
+            shared_path / f"{job_id}-output.jpg",
+        )
+        for image_id, job_id, _, _ in items
+    }
+    # Set once the inputs are staged: a batch is named after the job of its
+    # first staged image, since images that can't be read are dropped
+    manifest_path = None
+    tracker = None
 
-    # Paths as seen from inside the K8s Job container
-    container_input_path = f"/app/shared/{input_filename}"
-    container_output_path = f"/app/shared/{output_filename}"
+    def container_path(path: Path) -> str:
+        """The path as seen from inside the K8s Job container."""
+        return f"/app/shared/{path.name}"
 
     job_name = None
+    lease_keeper.hold(image_id for image_id, _, _, _ in items)
+    # Images handed to the imagetask, with the (input, output) locations it is
+    # given for each, and those whose status is final
+    images = {}
+    locations = {}
+    finished = set()
 
     try:
-        # 1. Write input image to shared volume
-        with open(input_path, "wb") as f:
-            f.write(image_data)
-        logger.info(
-            f"Wrote input image to shared volume",
-            path=str(input_path),
-            image_id=image_id,
-        )
-
-        # 2. Create K8s Job
-        job_name = create_k8s_job(
-            image_id, job_id, container_input_path, container_output_path
-        )
-
-        # 3. Wait for job completion (while streaming progress)
-        success = wait_for_job_completion(job_name, image_id=image_id, job_id=job_id)
-
-        if success:
-            # 4. Read output image
-            if output_path.exists():
+        # 1. Stage the input images
+        for image_id, job_id, blob_key, has_inline_data in items:
+            if TRANSPORT == "blob" and blob_key:
+                # The imagetask reads the blob itself
+                input_location = IMAGE_TASK_BLOB_PREFIX + blob_key
+            else:
+                image_data = load_image_data(
+                    image_id, job_id, blob_key, has_inline_data
+                )
+                if image_data is None:
+                    continue
+                if TRANSPORT == "blob":
+                    input_location = IMAGE_TASK_BLOB_PREFIX + blob_store.put(image_data)
+                else:
+                    with open(paths[image_id][0], "wb") as f:
+                        f.write(image_data)
+                    input_location = container_path(paths[image_id][0])
+            output_location = (
+                IMAGE_TASK_BLOB_PREFIX
+                if TRANSPORT == "blob"
+                else container_path(paths[image_id][1])
+            )
+            locations[image_id] = (input_location, output_location)
+            images[image_id] = job_id
+        if not images:
+            return
+        logger.info(f"Staged input images", images=list(images), transport=TRANSPORT)
+        first_image_id, first_job_id = next(iter(images.items()))
+        manifest_path = shared_path / f"{first_job_id}-manifest.json"
+
+        if EXECUTION_MODE == "pool":
+            # 2-3. Process on warm workers (progress comes with the response)
+            results = {
+                image_id: run_on_worker(image_id, job_id, *locations[image_id])
+                for image_id, job_id in images.items()
+            }
+        else:
+            # Registered before the Job exists so none of its events are missed
+            tracker = job_watcher.track(job_name_for(first_job_id))
+
+            # 2. Create K8s Job
+            if len(images) == 1:
+                input_location, output_location = locations[first_image_id]
+                args = [
+                    "process-image",
+                    f"--input-path={input_location}",
+                    f"--output-path={output_location}",
+                ]
+            else:
+                manifest = [
+                    {
+                        "id": image_id,
+                        "input_path": locations[image_id][0],
+                        "output_path": locations[image_id][1],
+                    }
+                    for image_id in images
+                ]
+                if TRANSPORT == "blob":
+                    # Small enough to pass inline, off the shared volume
+                    args = ["batch", f"--items={json.dumps(manifest)}"]
+                else:
+                    manifest_path.write_text(json.dumps(manifest))
+                    args = ["batch", f"--manifest={container_path(manifest_path)}"]
+            record_k8s_job(images, job_name_for(first_job_id))
+            job_name = create_k8s_job(first_image_id, first_job_id, args)
+
+            # 3. Wait for job completion (while streaming progress)
+            success = wait_for_job_completion(tracker, images)
+            outputs = job_outputs(tracker)
+            if len(images) == 1:
+                # The exit code tells a permanent failure from a transient one
+                results = {
+                    first_image_id: (
+                        success,
+                        tracker.exit_code != IMAGE_TASK_EXIT_PERMANENT,
+                        outputs.get(None),
+                    )
+                }
+            else:
+                # A batch fails if any image did; the others still have their
+                # output, and failed ones logged whether a retry may help
+                results = {
+                    image_id: (
+                        True,
+                        tracker.outcomes.get(image_id, {}).get("transient", True),
+                        outputs.get(image_id),
+                    )
+                    for image_id in images
+                }
+
+        # 4. Read output images and update DB
+        for image_id, job_id in images.items():
+            output_path = paths[image_id][1]
+            succeeded, transient, output = results[image_id]
+            if not succeeded:
+                update_image_job_status(
+                    image_id,
+                    job_id,
+                    success=False,
+                    error="Job failed",
+                    transient=transient,
+                )
+            elif TRANSPORT == "blob" and (output or "").startswith(
+                IMAGE_TASK_BLOB_PREFIX
+            ):
+                update_image_job_status(
+                    image_id,
+                    job_id,
+                    success=True,
+                    output_key=output[len(IMAGE_TASK_BLOB_PREFIX) :],
+                )
+            elif TRANSPORT != "blob" and output_path.exists():
                 with open(output_path, "rb") as f:
                     output_data = f.read()
-
-                # Update DB with processed image
                 update_image_job_status(
                     image_id, job_id, success=True, output_data=output_data
                 )
             else:
-                logger.error(
-                    f"Output file not found", path=str(output_path), image_id=image_id
+                error = (
+                    "Output not reported"
+                    if TRANSPORT == "blob"
+                    else "Output file not found"
                 )
+                logger.error(error, output=output, image_id=image_id)
+                # A failed batch item logged why
+                outcome = tracker.outcomes.get(image_id, {}) if tracker else {}
                 update_image_job_status(
-                    image_id, job_id, success=False, error="Output file not found"
+                    image_id,
+                    job_id,
+                    success=False,
+                    error=outcome.get("error", error),
+                    transient=transient,
                 )
-        else:
-            update_image_job_status(image_id, job_id, success=False, error="Job failed")
+            finished.add(image_id)
 
         # 5. Delete K8s Job
         if job_name:
             delete_k8s_job(job_name)
 
     except Exception as e:
-        logger.error(f"Error processing image: {e}", image_id=image_id)
-        update_image_job_status(image_id, job_id, success=False, error=str(e))
+        logger.error(f"Error processing images: {e}", images=list(images))
+        for image_id, job_id in images.items():
+            if image_id not in finished:
+                update_image_job_status(
+                    image_id, job_id, success=False, error=str(e), transient=True
+                )
 
         # Try to delete job if it was created
         if job_name:
@@ -667,21 +1653,34 @@ def process_image(image_id: str, image_data: bytes, job_id: str):
                 pass
 
     finally:
+        lease_keeper.release(image_id for image_id, _, _, _ in items)
+        if tracker:
+            job_watcher.untrack(tracker.job_name)
+
         # Cleanup temp files
-        try:
-            if input_path.exists():
-                input_path.unlink()
-            if output_path.exists():
-                output_path.unlink()
-        except Exception as e:
-            logger.warning(f"Failed to cleanup temp files: {e}")
+        if TRANSPORT != "blob":
+            try:
+                for path in [
+                    manifest_path,
+                    *(p for pair in paths.values() for p in pair),
+                ]:
+                    if path and path.exists():
+                        path.unlink()
+            except Exception as e:
+                logger.warning(f"Failed to cleanup temp files: {e}")
 
 
 def main():
     logger.info("Scheduler service starting up")
+    logger.info(f"Using {BLOB_STORE_BACKEND} blob store")
+    logger.info(f"Running images in {EXECUTION_MODE} mode")
+    logger.info(f"Passing images to the imagetask by {TRANSPORT}")
 
     # Initialize Kubernetes client
     init_k8s()
+    job_watcher.start()
+    progress_aggregator.start()
+    lease_keeper.start()
 
     # Ensure shared volume path exists
     shared_path = Path(SHARED_VOLUME_PATH)
@@ -689,22 +1688,53 @@ def main():
         logger.info(f"Creating shared volume path: {SHARED_VOLUME_PATH}")
         shared_path.mkdir(parents=True, exist_ok=True)
 
-    logger.info(f"Scheduler ready, polling every {POLL_INTERVAL}s")
+    logger.info(
+        f"Scheduler ready, polling every {POLL_INTERVAL}s",
+        max_concurrency=MAX_CONCURRENCY,
+    )
+
+    # Each job is waited on by its own thread; the main loop only hands out work
+    executor = ThreadPoolExecutor(max_workers=MAX_CONCURRENCY, thread_name_prefix="job")
+    quota = QuotaBackpressure()
+    in_flight = set()
+
+    def wait_for_slot(timeout):
+        """Sleep until a running job finishes or timeout passes."""
+        if in_flight:
+            wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+        else:
+            time.sleep(timeout)
 
     while True:
         try:
-            # Try to acquire an image job
-            result = acquire_image_job()
+            in_flight = {future for future in in_flight if not future.done()}
+            capacity = MAX_CONCURRENCY - len(in_flight)
+            if capacity > 0:
+                headroom = quota.available()
+                if headroom is not None and headroom < capacity:
+                    if headroom == 0:
+                        logger.debug(
+                            "Quota exhausted; waiting", in_flight=len(in_flight)
+                        )
+                    capacity = headroom
+            if capacity <= 0:
+                wait_for_slot(POLL_INTERVAL)
+                continue
 
-            if result[0] is not None:
-                image_id, image_data, job_id = result
-                process_image(image_id, image_data, job_id)
-            else:
+            # Claim enough images to fill the free slots, JOB_BATCH_SIZE per Job
+            batch_size = JOB_BATCH_SIZE if EXECUTION_MODE == "job" else 1
+            claimed = acquire_image_jobs(capacity * batch_size)
+            for start in range(0, len(claimed), batch_size):
+                batch = claimed[start : start + batch_size]
+                in_flight.add(executor.submit(process_images, batch))
+                quota.job_started()
+            if not claimed:
                 # No work available, sleep before next poll
-                time.sleep(POLL_INTERVAL)
+                wait_for_slot(POLL_INTERVAL)
 
         except KeyboardInterrupt:
             logger.info("Stopping scheduler service")
+            executor.shutdown(wait=False, cancel_futures=True)
             break
         except Exception as e:
             logger.error(f"Error in main loop: {e}")
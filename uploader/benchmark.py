@@ -0,0 +1,93 @@
+"""
+Compare the uploader's fast and legacy transform paths.
+
+    python benchmark.py [--megapixels 2,12,24,50] [--repeat 5] [--alpha]
+
+For each input size, a synthetic photo-like JPEG (or an RGBA PNG with --alpha)
+is transformed by both paths. Each path runs in a fresh process so the
+reported peak memory (max RSS above the process baseline) belongs to that path
+alone; tracemalloc would miss Pillow's image buffers, which are not allocated
+through Python.
+"""
+
+import argparse
+import resource
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from multiprocessing import get_context
+
+from PIL import Image
+
+from transform import transform_image
+
+
+def make_input(megapixels: float, alpha: bool) -> bytes:
+    """A 4:3 image with gradients and noise, so it compresses like a photo."""
+    width = int((megapixels * 1_000_000 * 4 / 3) ** 0.5)
+    height = int(width * 3 / 4)
+    gradient = Image.linear_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 48)
+    img = Image.merge("RGB", (gradient, noise, gradient.transpose(Image.ROTATE_180)))
+
+    output = BytesIO()
+    if alpha:
+        img.putalpha(gradient.transpose(Image.FLIP_LEFT_RIGHT))
+        img.save(output, format="PNG")
+    else:
+        img.save(output, format="JPEG", quality=90)
+    return output.getvalue()
+
+
+def run_case(contents: bytes, resize_height: int, fast: bool, repeat: int):
+    """Runs in a fresh process: latencies (ms) and peak RSS growth (KiB)."""
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    latencies = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        transform_image(BytesIO(contents), resize_height, time.time(), fast=fast)
+        latencies.append((time.perf_counter() - started) * 1000)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return latencies, peak - baseline
+
+
+def measure(contents: bytes, resize_height: int, fast: bool, repeat: int):
+    with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+        return pool.submit(run_case, contents, resize_height, fast, repeat).result()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--megapixels",
+        default="2,12,24,50",
+        help="Comma-separated input sizes in megapixels",
+    )
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--height", type=int, default=256, help="Resize height")
+    parser.add_argument(
+        "--alpha", action="store_true", help="Use RGBA PNG inputs instead of JPEG"
+    )
+    args = parser.parse_args()
+
+    print(
+        f"{'input':>12} {'path':>7} {'median ms':>10} {'min ms':>8} "
+        f"{'peak MiB':>9} {'speedup':>8}"
+    )
+    for megapixels in (float(mp) for mp in args.megapixels.split(",")):
+        contents = make_input(megapixels, args.alpha)
+        label = f"{megapixels:g}MP {'png' if args.alpha else 'jpeg'}"
+        results = {}
+        for path, fast in (("legacy", False), ("fast", True)):
+            latencies, peak_kib = measure(contents, args.height, fast, args.repeat)
+            results[path] = statistics.median(latencies)
+            speedup = results["legacy"] / results[path]
+            print(
+                f"{label:>12} {path:>7} {results[path]:>10.1f} {min(latencies):>8.1f} "
+                f"{peak_kib / 1024:>9.1f} {speedup:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
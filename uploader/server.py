@@ -1,33 +1,56 @@
 import os
+import hashlib
+import shutil
+import tarfile
+import tempfile
+import time
 import uuid
-from pathlib import Path
-from io import BytesIO
+import zipfile
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import nullcontext
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path, PurePosixPath
+from typing import List, Optional
 
-from fastapi import FastAPI, UploadFile, HTTPException
+from fastapi import FastAPI, File, UploadFile, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
-from PIL import Image
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from psycopg.conninfo import make_conninfo
+from psycopg_pool import AsyncConnectionPool
 from loguru import logger
 import sys
 
+from transform import ImageTooLarge, transform_image
+
 logger.remove()
 logger.add(sys.stdout, serialize=True, enqueue=True)
 
 
-def on_startup():
+async def on_startup():
     logger.info("Uploader server starting up")
+    start_transform_pool()
+    logger.info(
+        "Transform pool started", workers=UPLOADER_WORKERS, max_pending=MAX_PENDING
+    )
+    if DIRECT_DB:
+        # Don't block startup on the database: uploads fall back to the folder
+        await db_pool.open(wait=False)
+        logger.info("Writing uploads straight to the database", host=DB_HOST)
 
 
-app = FastAPI(on_startup=[on_startup])
+async def on_shutdown():
+    transform_pool.shutdown(wait=True, cancel_futures=True)
+    if DIRECT_DB:
+        await db_pool.close()
 
 
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],  # Adjust this to your frontend's origin in production
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+app = FastAPI(on_startup=[on_startup], on_shutdown=[on_shutdown])
 
 # Environment variables (use coherent UPLOADER_ prefix; fall back to older names for
 # backwards compatibility)
@@ -36,6 +59,55 @@ RESIZE_HEIGHT = int(
     os.getenv("UPLOADER_RESIZE_HEIGHT", os.getenv("RESIZE_HEIGHT", "256"))
 )
 
+# Shrink JPEGs while decoding (draft/reduce) and skip the RGBA round-trip for
+# images without alpha; "false" restores the full-resolution pipeline
+FAST_RESIZE = os.getenv("UPLOADER_FAST_RESIZE", "true").lower() in ("1", "true", "yes")
+# Decode/resize/encode runs in this many worker processes, off the event loop
+UPLOADER_WORKERS = max(1, int(os.getenv("UPLOADER_WORKERS", "2")))
+# Uploads queued or being transformed; beyond this new uploads get a 503
+MAX_PENDING = max(1, int(os.getenv("UPLOADER_MAX_PENDING", "8")))
+# Seconds clients are told to wait before retrying a rejected upload
+RETRY_AFTER = int(os.getenv("UPLOADER_RETRY_AFTER", "2"))
+# Uploads whose stage timings /stats summarises
+STATS_WINDOW = int(os.getenv("UPLOADER_STATS_WINDOW", "1000"))
+
+# Largest accepted upload in bytes, and in pixels (checked from the image header
+# before decoding)
+MAX_UPLOAD_BYTES = int(os.getenv("UPLOADER_MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))
+MAX_PIXELS = int(os.getenv("UPLOADER_MAX_PIXELS", "100000000"))
+# Room for the multipart boundaries and part headers around the file
+MULTIPART_OVERHEAD = 64 * 1024
+# Uploads are spooled here (default: the system temp dir) for the worker processes
+SPOOL_PATH = os.getenv("UPLOADER_SPOOL_PATH") or None
+SPOOL_CHUNK_SIZE = 1024 * 1024
+# POST /upload/batch limits: file count (the multipart parser also stops at
+# 1000 parts) and total request size
+BATCH_MAX_FILES = int(os.getenv("UPLOADER_BATCH_MAX_FILES", "1000"))
+BATCH_MAX_BYTES = int(os.getenv("UPLOADER_BATCH_MAX_BYTES", str(1024 * 1024 * 1024)))
+# Archive members are picked by extension; multipart files by content type
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".gif", ".bmp", ".webp", ".tif", ".tiff"}
+
+# Direct mode: store the encoded JPEG in the blob store and insert its row
+# ourselves, instead of dropping a file for the pusher. The upload folder stays
+# the fallback while the database is unreachable.
+DIRECT_DB = os.getenv("UPLOADER_DIRECT_DB", "false").lower() in ("1", "true", "yes")
+DB_HOST = os.getenv("UPLOADER_DB_HOST", os.getenv("POSTGRES_HOST", "localhost"))
+DB_PORT = os.getenv("UPLOADER_DB_PORT", os.getenv("POSTGRES_PORT", "5432"))
+DB_NAME = os.getenv("UPLOADER_DB_NAME", os.getenv("POSTGRES_DB", "imagomortis"))
+DB_USER = os.getenv("UPLOADER_DB_USER", os.getenv("POSTGRES_USER", "postgres"))
+DB_PASSWORD = os.getenv(
+    "UPLOADER_DB_PASSWORD", os.getenv("POSTGRES_PASSWORD", "postgres")
+)
+DB_POOL_MAX_SIZE = int(os.getenv("UPLOADER_DB_POOL_MAX_SIZE", "4"))
+# Kept short so uploads quickly fall back to the folder when the database is down
+DB_POOL_TIMEOUT = float(os.getenv("UPLOADER_DB_POOL_TIMEOUT", "2"))
+
+# Blob store configuration (shared by pusher, scheduler and API)
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", "./blobs")
+BLOB_STORE_S3_BUCKET = os.getenv("BLOB_STORE_S3_BUCKET", "imagomortis")
+BLOB_STORE_S3_ENDPOINT = os.getenv("BLOB_STORE_S3_ENDPOINT") or None
+
 # Host/port configuration for the Uvicorn server
 UPLOADER_HOST = os.getenv("UPLOADER_HOST", "0.0.0.0")
 UPLOADER_PORT = int(os.getenv("UPLOADER_PORT", "8000"))
@@ -44,13 +116,376 @@ UPLOADER_PORT = int(os.getenv("UPLOADER_PORT", "8000"))
 Path(STORAGE_PATH).mkdir(parents=True, exist_ok=True)
 
 
+class MaxBodySizeMiddleware:
+    """Reject request bodies over a per-path limit before they are parsed.
+
+    A declared Content-Length over the limit is refused straight away; chunked
+    or understated bodies are cut off as soon as the running total passes it.
+    """
+
+    def __init__(self, app, limits):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = Headers(scope=scope).get("content-length", "")
+        if content_length.isdigit() and int(content_length) > limit:
+            response = JSONResponse(
+                status_code=413,
+                content={"detail": f"Request body exceeds {limit} bytes"},
+            )
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    # Raised inside the form parser; FastAPI passes it through
+                    raise HTTPException(
+                        status_code=413, detail=f"Request body exceeds {limit} bytes"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(
+    MaxBodySizeMiddleware,
+    limits={
+        "/upload": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD,
+        "/upload/batch": BATCH_MAX_BYTES,
+    },
+)
+# Added last so it is outermost and 413s carry CORS headers too
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],  # Adjust this to your frontend's origin in production
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+)
+
+db_pool = AsyncConnectionPool(
+    make_conninfo(
+        host=DB_HOST, port=DB_PORT, dbname=DB_NAME, user=DB_USER, password=DB_PASSWORD
+    ),
+    min_size=1,
+    max_size=DB_POOL_MAX_SIZE,
+    timeout=DB_POOL_TIMEOUT,
+    open=False,
+)
+
+
+class LocalBlobStore:
+    """Content-addressed blobs on a local (or PVC-mounted) filesystem."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key[2:4] / key
+
+    def put(self, data) -> str:
+        """Store data and return its key (the SHA-256 of the content)."""
+        key = hashlib.sha256(data).hexdigest()
+        path = self._path(key)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write under a temporary name so readers never see a partial blob
+            tmp_path = path.with_name(f".{key}.{uuid.uuid4().hex}.tmp")
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        else:
+            # Refresh the mtime so garbage collection treats the blob as new again
+            os.utime(path)
+        return key
+
+
+class S3BlobStore:
+    """Content-addressed blobs in an S3-compatible bucket (AWS S3, MinIO, ...)."""
+
+    def __init__(self, bucket: str, endpoint_url: str = None):
+        # Only needed for this backend; credentials come from the AWS_* env vars
+        import boto3
+
+        self.bucket = bucket
+        self.client = boto3.client("s3", endpoint_url=endpoint_url)
+
+    def put(self, data) -> str:
+        """Store data and return its key (the SHA-256 of the content)."""
+        key = hashlib.sha256(data).hexdigest()
+        self.client.put_object(Bucket=self.bucket, Key=key, Body=bytes(data))
+        return key
+
+
+def get_blob_store():
+    """Build the blob store selected by BLOB_STORE_BACKEND."""
+    if BLOB_STORE_BACKEND == "s3":
+        return S3BlobStore(BLOB_STORE_S3_BUCKET, BLOB_STORE_S3_ENDPOINT)
+    return LocalBlobStore(BLOB_STORE_PATH)
+
+
+blob_store = get_blob_store() if DIRECT_DB else None
+
+transform_pool = None
+pending_uploads = 0
+# Batch items in the transform pool at once
+batch_slots = asyncio.Semaphore(UPLOADER_WORKERS)
+
+
+def start_transform_pool():
+    global transform_pool
+    transform_pool = ProcessPoolExecutor(max_workers=UPLOADER_WORKERS)
+
+
+def restart_transform_pool(broken_pool):
+    """Replace a pool whose worker died, unless another request already did."""
+    if transform_pool is broken_pool:
+        broken_pool.shutdown(wait=False, cancel_futures=True)
+        start_transform_pool()
+
+
+class UploadStats:
+    """Upload counters and per-stage timings of the most recent uploads."""
+
+    def __init__(self, window: int):
+        self.counters = {"accepted": 0, "rejected": 0, "failed": 0, "completed": 0}
+        self.timings = {}
+        self.window = window
+
+    def record(self, timings):
+        for stage, ms in timings.items():
+            self.timings.setdefault(stage, deque(maxlen=self.window)).append(ms)
+
+    def summary(self):
+        stages = {}
+        for stage, samples in self.timings.items():
+            ordered = sorted(samples)
+            stages[stage] = {
+                "count": len(ordered),
+                "mean": round(sum(ordered) / len(ordered), 2),
+                "p50": round(ordered[len(ordered) // 2], 2),
+                "p95": round(ordered[int(len(ordered) * 0.95)], 2),
+                "max": round(ordered[-1], 2),
+            }
+        return stages
+
+
+upload_stats = UploadStats(STATS_WINDOW)
+
+
+def spool_upload(source, max_bytes: int) -> Path:
+    """Copy an upload to a named temp file in chunks, refusing oversized ones.
+
+    Worker processes read the image from this file, so the original is never
+    held in memory as a whole.
+    """
+    with tempfile.NamedTemporaryFile(
+        dir=SPOOL_PATH, prefix="upload-", delete=False
+    ) as spool:
+        spool_path = Path(spool.name)
+        try:
+            written = 0
+            while chunk := source.read(SPOOL_CHUNK_SIZE):
+                written += len(chunk)
+                if written > max_bytes:
+                    raise HTTPException(
+                        status_code=413, detail=f"File exceeds {max_bytes} bytes"
+                    )
+                spool.write(chunk)
+        except BaseException:
+            spool_path.unlink(missing_ok=True)
+            raise
+    return spool_path
+
+
+async def insert_image(file_uuid, jpeg_data: bytes, metadata) -> str:
+    """Store an encoded upload and insert its row, as the pusher would.
+
+    Returns the image id: file_uuid, or the id of the image that already has
+    the same content.
+    """
+    blob_key = await run_in_threadpool(blob_store.put, jpeg_data)
+    async with db_pool.connection() as conn:
+        cur = await conn.execute(
+            """
+            INSERT INTO images (id, blob_key, content_hash, image_resolution, size, orientation, color_mode, phash, updated_at)
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT DO NOTHING
+            RETURNING id
+            """,
+            (
+                file_uuid,
+                blob_key,
+                blob_key,
+                metadata["resolution"],
+                len(jpeg_data),
+                metadata["orientation"],
+                metadata["color_mode"],
+                metadata["phash"],
+            ),
+        )
+        row = await cur.fetchone()
+        if row is None:
+            # Already stored: hand back the existing image instead of a new row
+            cur = await conn.execute(
+                "SELECT id FROM images WHERE content_hash = %s", (blob_key,)
+            )
+            row = await cur.fetchone()
+    if row is None:
+        raise RuntimeError(f"Image with content {blob_key} vanished during insert")
+    return str(row[0])
+
+
+def write_upload(file_path: Path, tmp_path: Path, data: bytes):
+    """Write the JPEG under its temporary name, then rename it into place."""
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, file_path)
+
+
+@app.get("/stats")
+async def get_stats():
+    """Queue depth, upload counters and stage timings (milliseconds)."""
+    return {
+        "workers": UPLOADER_WORKERS,
+        "max_pending": MAX_PENDING,
+        "pending": pending_uploads,
+        # Uploads waiting for a free worker process
+        "queued": max(0, pending_uploads - UPLOADER_WORKERS),
+        **upload_stats.counters,
+        "timings_ms": upload_stats.summary(),
+    }
+
+
+async def process_upload(
+    spool_path: Path, target_dir: Path, file_uuid, read_ms: float, direct=False
+) -> str:
+    """Transform a spooled upload in the worker pool and write it to target_dir.
+
+    With direct=True (and UPLOADER_DIRECT_DB on) the image goes straight to the
+    blob store and database instead, falling back to target_dir on failure.
+    Takes ownership of spool_path. Failures are raised as HTTPException with the
+    status the client should see. Returns the image id.
+    """
+    # Create the new filename with UUID (always store as JPEG)
+    new_filename = f"{file_uuid}.jpg"
+    file_path = target_dir / new_filename
+    # Write under a hidden temporary name and rename it into place once complete,
+    # so the pusher never picks up a partially written file
+    tmp_path = target_dir / f".{new_filename}.tmp"
+
+    upload_stats.counters["accepted"] += 1
+    started = time.perf_counter()
+    pool = transform_pool
+    try:
+        # Decode, resize and encode in a worker process
+        loop = asyncio.get_running_loop()
+        jpeg_data, timings, metadata = await loop.run_in_executor(
+            pool,
+            transform_image,
+            str(spool_path),
+            RESIZE_HEIGHT,
+            time.time(),
+            FAST_RESIZE,
+            MAX_PIXELS,
+        )
+        transform_done = time.perf_counter()
+
+        image_id = None
+        if direct and DIRECT_DB:
+            try:
+                image_id = await insert_image(file_uuid, jpeg_data, metadata)
+            except Exception as e:
+                logger.warning(
+                    f"Direct insert failed, using the upload folder: {str(e)}",
+                    uuid=str(file_uuid),
+                )
+        stored_in = "database" if image_id else "folder"
+        if image_id is None:
+            await run_in_threadpool(write_upload, file_path, tmp_path, jpeg_data)
+            image_id = str(file_uuid)
+        finished = time.perf_counter()
+
+        timings["read_ms"] = read_ms
+        timings["write_ms"] = (finished - transform_done) * 1000
+        timings["total_ms"] = read_ms + (finished - started) * 1000
+        upload_stats.record(timings)
+        upload_stats.counters["completed"] += 1
+
+        # log file size
+        file_size = len(jpeg_data)
+        logger.info(
+            f"Saved file {new_filename} ({file_size} bytes)",
+            file_size=file_size,
+            uuid=str(file_uuid),
+            image_id=image_id,
+            stored_in=stored_in,
+            path=str(file_path),
+            **{stage: round(ms, 2) for stage, ms in timings.items()},
+        )
+        return image_id
+
+    except ImageTooLarge as e:
+        upload_stats.counters["failed"] += 1
+        logger.warning(str(e), uuid=str(file_uuid))
+        raise HTTPException(status_code=413, detail=str(e))
+    except BrokenProcessPool:
+        # A worker died (e.g. OOM-killed); replace the pool for later uploads
+        upload_stats.counters["failed"] += 1
+        tmp_path.unlink(missing_ok=True)
+        logger.error("Transform worker died; restarting pool", uuid=str(file_uuid))
+        restart_transform_pool(pool)
+        raise HTTPException(
+            status_code=503,
+            detail="Image processing worker failed, retry later",
+            headers={"Retry-After": str(RETRY_AFTER)},
+        )
+    except Exception as e:
+        upload_stats.counters["failed"] += 1
+        tmp_path.unlink(missing_ok=True)
+        logger.error(f"Failed to save file: {str(e)}", uuid=str(file_uuid))
+        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    finally:
+        spool_path.unlink(missing_ok=True)
+
+
 @app.post("/upload")
 async def upload_image(file: UploadFile):
+    global pending_uploads
+
     # Validate that the file is an image
     if not file.content_type or not file.content_type.startswith("image/"):
         logger.error(f"Invalid file type: {file.content_type}")
         raise HTTPException(status_code=400, detail="File must be an image")
 
+    # Shed load instead of queueing without bound behind the worker processes
+    if pending_uploads >= MAX_PENDING:
+        upload_stats.counters["rejected"] += 1
+        logger.warning("Upload queue full", pending=pending_uploads)
+        raise HTTPException(
+            status_code=503,
+            detail="Upload queue is full, retry later",
+            headers={"Retry-After": str(RETRY_AFTER)},
+        )
+
+    # Cheap early check when the parser already knows the size
+    if file.size is not None and file.size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413, detail=f"File exceeds {MAX_UPLOAD_BYTES} bytes"
+        )
+
     # Generate UUID for the filename
     file_uuid = uuid.uuid4()
 
@@ -59,58 +494,200 @@ async def upload_image(file: UploadFile):
         uuid=str(file_uuid),
     )
 
-    # Create the new filename with UUID (always store as JPEG)
-    new_filename = f"{file_uuid}.jpg"
-    file_path = Path(STORAGE_PATH) / new_filename
+    pending_uploads += 1
+    try:
+        started = time.perf_counter()
+        spool_path = await run_in_threadpool(spool_upload, file.file, MAX_UPLOAD_BYTES)
+        read_ms = (time.perf_counter() - started) * 1000
+        image_id = await process_upload(
+            spool_path, Path(STORAGE_PATH), file_uuid, read_ms, direct=True
+        )
+    finally:
+        pending_uploads -= 1
+
+    # image_id differs from file_uuid when the content was already stored
+    return JSONResponse(
+        status_code=201,
+        content={"uuid": image_id, "filename": f"{image_id}.jpg"},
+    )
+
+
+@dataclass
+class BatchItem:
+    filename: str
+    spool_path: Optional[Path] = None
+    read_ms: float = 0.0
+    # Set for items rejected before processing
+    status: Optional[int] = None
+    error: Optional[str] = None
+
+
+def iter_archive(source, filename: str):
+    """Yield (name, size, open_member) for each regular file of a tar or zip."""
+    name = filename.lower()
+    if name.endswith(".zip"):
+        with zipfile.ZipFile(source) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    yield info.filename, info.file_size, partial(archive.open, info)
+    elif name.endswith((".tar", ".tar.gz", ".tgz")):
+        # Stream mode: members are read in order without seeking
+        with tarfile.open(fileobj=source, mode="r|*") as archive:
+            for member in archive:
+                if member.isfile():
+                    yield member.name, member.size, partial(
+                        archive.extractfile, member
+                    )
+    else:
+        raise HTTPException(
+            status_code=400, detail="Archive must be a .zip, .tar, .tar.gz or .tgz"
+        )
+
+
+def collect_batch(files, archive) -> List[BatchItem]:
+    """Spool every file of a batch request, rejecting non-images and oversized files.
+
+    Runs in a thread: archives are unpacked here, one member at a time.
+    """
+    items = []
+
+    def add(filename: str, size, open_source):
+        if len(items) >= BATCH_MAX_FILES:
+            raise HTTPException(
+                status_code=413, detail=f"Batch exceeds {BATCH_MAX_FILES} files"
+            )
+        if size is not None and size > MAX_UPLOAD_BYTES:
+            items.append(
+                BatchItem(
+                    filename,
+                    status=413,
+                    error=f"File exceeds {MAX_UPLOAD_BYTES} bytes",
+                )
+            )
+            return
+        started = time.perf_counter()
+        try:
+            with open_source() as source:
+                spool_path = spool_upload(source, MAX_UPLOAD_BYTES)
+        except HTTPException as e:
+            items.append(BatchItem(filename, status=e.status_code, error=e.detail))
+            return
+        read_ms = (time.perf_counter() - started) * 1000
+        items.append(BatchItem(filename, spool_path=spool_path, read_ms=read_ms))
 
-    # Save the file (convert to JPEG)
     try:
-        contents = await file.read()
-
-        # Open image
-        img = Image.open(BytesIO(contents))
-
-        # Convert to RGBA to consistently handle alpha channels
-        img = img.convert("RGBA")
-
-        # Calculate new width to preserve aspect ratio
-        original_width, original_height = img.size
-        aspect_ratio = original_width / original_height
-        new_height = RESIZE_HEIGHT
-        new_width = int(new_height * aspect_ratio)
-
-        # Resize the image
-        resized_img = img.resize((new_width, new_height), Image.Resampling.LANCZOS)
-
-        # Prepare final RGB image for JPEG (use white background if alpha present)
-        if resized_img.mode in ("RGBA", "LA") or (
-            resized_img.mode == "P" and "transparency" in resized_img.info
-        ):
-            background = Image.new("RGB", resized_img.size, (255, 255, 255))
-            alpha = resized_img.split()[-1]
-            background.paste(resized_img, mask=alpha)
-            final_img = background
-        else:
-            final_img = resized_img.convert("RGB")
+        for file in files:
+            if not file.content_type or not file.content_type.startswith("image/"):
+                items.append(
+                    BatchItem(file.filename, status=400, error="File must be an image")
+                )
+                continue
+            add(file.filename, file.size, lambda file=file: nullcontext(file.file))
 
-        # Save as JPEG
-        final_img.save(file_path, format="JPEG", quality=85)
+        if archive is not None:
+            for name, size, open_member in iter_archive(
+                archive.file, archive.filename or ""
+            ):
+                basename = PurePosixPath(name).name
+                # Skip hidden files and macOS resource forks
+                if basename.startswith(".") or name.startswith("__MACOSX/"):
+                    continue
+                if PurePosixPath(basename).suffix.lower() not in IMAGE_SUFFIXES:
+                    items.append(
+                        BatchItem(name, status=400, error="File must be an image")
+                    )
+                    continue
+                add(name, size, open_member)
+    except (tarfile.TarError, zipfile.BadZipFile) as e:
+        discard_batch(items)
+        raise HTTPException(status_code=400, detail=f"Invalid archive: {str(e)}")
+    except BaseException:
+        discard_batch(items)
+        raise
+    return items
 
-        # log file size
-        file_size = file_path.stat().st_size
-        logger.info(
-            f"Saved file {new_filename} ({file_size} bytes)",
-            file_size=file_size,
-            uuid=str(file_uuid),
-            path=str(file_path),
+
+def discard_batch(items: List[BatchItem]):
+    for item in items:
+        if item.spool_path is not None:
+            item.spool_path.unlink(missing_ok=True)
+
+
+async def process_batch_item(item: BatchItem, staging_dir: Path):
+    """Run one spooled batch item through the pipeline; returns its result."""
+    if item.spool_path is None:
+        return {"filename": item.filename, "status": item.status, "error": item.error}
+
+    file_uuid = uuid.uuid4()
+    # Batch items wait for a slot rather than being shed with a 503, and never
+    # take more than UPLOADER_WORKERS pool slots from interactive uploads
+    async with batch_slots:
+        try:
+            await process_upload(item.spool_path, staging_dir, file_uuid, item.read_ms)
+        except HTTPException as e:
+            return {
+                "filename": item.filename,
+                "status": e.status_code,
+                "error": e.detail,
+            }
+    return {"filename": item.filename, "status": 201, "uuid": str(file_uuid)}
+
+
+@app.post("/upload/batch")
+async def upload_batch(
+    files: List[UploadFile] = File(default=[]),
+    archive: Optional[UploadFile] = File(default=None),
+):
+    """Upload many images at once, as multipart `files` and/or a tar/zip `archive`.
+
+    Images are written to a hidden staging folder that is renamed to
+    `batch-<id>` once every item is done, so the pusher ingests the batch as
+    one unit. Each item gets its own result; the request only fails as a
+    whole when nothing could be stored.
+    """
+    if not files and archive is None:
+        raise HTTPException(status_code=400, detail="No files or archive in request")
+    if len(files) > BATCH_MAX_FILES:
+        raise HTTPException(
+            status_code=413, detail=f"Batch exceeds {BATCH_MAX_FILES} files"
         )
 
-    except Exception as e:
-        logger.error(f"Failed to save file: {str(e)}", uuid=str(file_uuid))
-        raise HTTPException(status_code=500, detail=f"Failed to save file: {str(e)}")
+    batch_id = uuid.uuid4().hex
+    staging_dir = Path(STORAGE_PATH) / f".batch-{batch_id}"
+    logger.info("Receiving batch upload", batch_id=batch_id, files=len(files))
+
+    items = await run_in_threadpool(collect_batch, files, archive)
+    try:
+        staging_dir.mkdir()
+        results = await asyncio.gather(
+            *(process_batch_item(item, staging_dir) for item in items)
+        )
+    except BaseException:
+        discard_batch(items)
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        raise
+
+    accepted = sum(1 for result in results if result["status"] == 201)
+    if accepted:
+        # Publish the batch to the pusher in one atomic rename
+        os.replace(staging_dir, Path(STORAGE_PATH) / f"batch-{batch_id}")
+    else:
+        shutil.rmtree(staging_dir, ignore_errors=True)
 
+    logger.info(
+        f"Batch upload complete: {accepted} of {len(results)} images saved",
+        batch_id=batch_id,
+        accepted=accepted,
+        failed=len(results) - accepted,
+    )
     return JSONResponse(
-        status_code=201, content={"uuid": str(file_uuid), "filename": new_filename}
+        status_code=201 if accepted else 422,
+        content={
+            "batch_id": batch_id,
+            "accepted": accepted,
+            "failed": len(results) - accepted,
+            "results": results,
+        },
     )
 
 
@@ -0,0 +1,157 @@
+"""
+Image transform pipeline run by the uploader's worker processes.
+
+Kept apart from server.py so worker processes only need Pillow, and so the
+pipeline can be exercised without starting the web app.
+"""
+
+import time
+from io import BytesIO
+
+from PIL import Image
+
+JPEG_QUALITY = 85
+# The fast path shrinks the source (DCT scaling for JPEG, reduce() otherwise) to
+# no less than this multiple of the target size before the final LANCZOS pass,
+# which keeps the result visually identical to a full-resolution resample
+REDUCING_GAP = 2.0
+# dHash compares horizontally adjacent pixels of a 9x8 thumbnail: 64 bits,
+# matching the pusher's probe
+HASH_SIZE = 8
+
+
+class ImageTooLarge(ValueError):
+    """The image header declares more pixels than the configured maximum."""
+
+
+def target_size(size, resize_height: int):
+    """Width and height after resizing to resize_height, preserving aspect ratio."""
+    original_width, original_height = size
+    aspect_ratio = original_width / original_height
+    new_height = resize_height
+    new_width = int(new_height * aspect_ratio)
+    return new_width, new_height
+
+
+def has_alpha(img) -> bool:
+    return img.mode in ("RGBA", "LA", "PA") or "transparency" in img.info
+
+
+def flatten(img):
+    """Composite an RGBA image over a white background."""
+    background = Image.new("RGB", img.size, (255, 255, 255))
+    alpha = img.split()[-1]
+    background.paste(img, mask=alpha)
+    return background
+
+
+def resize_legacy(img, size):
+    """Full-resolution RGBA resample (the original pipeline)."""
+    # Resize the image
+    resized_img = img.resize(size, Image.Resampling.LANCZOS)
+
+    # Prepare final RGB image for JPEG (use white background if alpha present)
+    if resized_img.mode in ("RGBA", "LA") or (
+        resized_img.mode == "P" and "transparency" in resized_img.info
+    ):
+        return flatten(resized_img)
+    return resized_img.convert("RGB")
+
+
+def resize_fast(img, size):
+    """Resample in the source's own mode, only going through RGBA for alpha."""
+    if has_alpha(img):
+        resized_img = img.convert("RGBA").resize(
+            size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP
+        )
+        return flatten(resized_img)
+    # LANCZOS needs a continuous-tone mode; RGB and L resize as they are
+    if img.mode not in ("RGB", "L"):
+        img = img.convert("RGB")
+    resized_img = img.resize(size, Image.Resampling.LANCZOS, reducing_gap=REDUCING_GAP)
+    return resized_img.convert("RGB")
+
+
+def difference_hash(jpeg: bytes) -> int:
+    """64-bit dHash of an encoded JPEG, as a signed integer (Postgres BIGINT).
+
+    Step for step the same as difference_hash in pusher/probe.py, run on the
+    same bytes the pusher would probe, so both services store the same value.
+    """
+    with Image.open(BytesIO(jpeg)) as img:
+        # Decode straight to grayscale at 1/2, 1/4 or 1/8 scale
+        img.draft("L", (HASH_SIZE + 1, HASH_SIZE))
+        small = img.convert("L")
+    pixels = list(small.resize((HASH_SIZE + 1, HASH_SIZE), Image.BILINEAR).getdata())
+
+    value = 0
+    for row in range(HASH_SIZE):
+        offset = row * (HASH_SIZE + 1)
+        for col in range(HASH_SIZE):
+            left = pixels[offset + col]
+            right = pixels[offset + col + 1]
+            value = (value << 1) | (left > right)
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+def transform_image(
+    source,
+    resize_height: int,
+    submitted_at: float,
+    fast: bool = True,
+    max_pixels: int = None,
+):
+    """Decode, resize to resize_height and re-encode an upload as JPEG.
+
+    source is a file path or a binary file object. Returns the JPEG bytes, the
+    time spent in each stage in milliseconds, and the metadata the pusher would
+    record for the JPEG (for uploads written straight to the database). submitted_at is the
+    submitter's time.time(), used to report the time spent waiting for a free
+    worker. fast=False runs the original full-resolution RGBA pipeline.
+
+    Raises ImageTooLarge, before any pixel data is decoded, when the image has
+    more than max_pixels pixels.
+    """
+    started = time.time()
+    timings = {"queue_ms": max(0.0, (started - submitted_at) * 1000)}
+
+    # Open image
+    t0 = time.perf_counter()
+    with Image.open(source) as img:
+        # Image.open only parses the header, so this check costs no decoding
+        if max_pixels and img.width * img.height > max_pixels:
+            raise ImageTooLarge(
+                f"Image is {img.width}x{img.height}, more than {max_pixels} pixels"
+            )
+        size = target_size(img.size, resize_height)
+
+        if fast:
+            # JPEG only: decode at 1/2, 1/4 or 1/8 scale, staying above the gap
+            img.draft(
+                img.mode, (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP))
+            )
+            img.load()
+        else:
+            # Convert to RGBA to consistently handle alpha channels
+            img = img.convert("RGBA")
+        t1 = time.perf_counter()
+        timings["decode_ms"] = (t1 - t0) * 1000
+
+        final_img = resize_fast(img, size) if fast else resize_legacy(img, size)
+        t2 = time.perf_counter()
+        timings["resize_ms"] = (t2 - t1) * 1000
+
+        # Encode as JPEG
+        output = BytesIO()
+        final_img.save(output, format="JPEG", quality=JPEG_QUALITY)
+        jpeg = output.getvalue()
+        timings["encode_ms"] = (time.perf_counter() - t2) * 1000
+
+    metadata = {
+        "resolution": f"{final_img.width}x{final_img.height}",
+        "color_mode": final_img.mode,
+        # The encoded JPEG carries no EXIF, so it is always upright
+        "orientation": 1,
+        "phash": difference_hash(jpeg),
+    }
+    return jpeg, timings, metadata
@@ -1,5 +1,10 @@
 import { getGlobalConfig } from '$lib/config';
-import type { Image } from './models';
+import type { ImageChanges, ImageList, JobEvent } from './models';
+
+/**
+ * Raised when a change token is too old and the full list must be reloaded
+ */
+export class ChangeTokenExpiredError extends Error {}
 
 /**
  * Get the API service URL from the global config
@@ -32,11 +37,12 @@ export class ImageService {
 	}
 
 	/**
-	 * Get all images metadata from the server
-	 * @returns Promise with array of Image objects
+	 * Get the latest page of images metadata from the server.
+	 * The response carries an ETag, so unchanged lists are revalidated by the browser cache.
+	 * @returns Promise with the images and the token to pass to getImageChanges
 	 * @throws Error if the request fails
 	 */
-	async getImages(): Promise<Image[]> {
+	async getImages(): Promise<ImageList> {
 		const response = await fetch(`${this.baseUrl}/images`);
 
 		if (!response.ok) {
@@ -44,9 +50,49 @@ export class ImageService {
 			throw new Error(errorData.detail || `Failed to fetch images with status ${response.status}`);
 		}
 
+		return {
+			images: await response.json(),
+			changeToken: response.headers.get('X-Change-Token')
+		};
+	}
+
+	/**
+	 * Get the images changed and deleted since a change token
+	 * @param since - Token from getImages or from a previous call
+	 * @returns Promise with the changes and the next token
+	 * @throws ChangeTokenExpiredError if the token is too old, Error if the request fails
+	 */
+	async getImageChanges(since: string): Promise<ImageChanges> {
+		const response = await fetch(`${this.baseUrl}/images?since=${encodeURIComponent(since)}`);
+
+		if (response.status === 410) {
+			throw new ChangeTokenExpiredError('Change token expired');
+		}
+		if (!response.ok) {
+			const errorData = await response.json().catch(() => ({ detail: 'Failed to fetch changes' }));
+			throw new Error(errorData.detail || `Failed to fetch changes with status ${response.status}`);
+		}
+
 		return response.json();
 	}
 
+	/**
+	 * Subscribe to job progress pushed by the API
+	 * @param onEvent - Called for every job event
+	 * @returns Function that closes the subscription
+	 */
+	subscribeToJobEvents(onEvent: (event: JobEvent) => void): () => void {
+		const source = new EventSource(`${this.baseUrl}/images/events`);
+		source.onmessage = (message) => {
+			try {
+				onEvent(JSON.parse(message.data));
+			} catch (e) {
+				console.warn('Invalid job event:', message.data);
+			}
+		};
+		return () => source.close();
+	}
+
 	/**
 	 * Get a single image by ID
 	 * @param imageId - The UUID of the image
@@ -68,11 +114,13 @@ export class ImageService {
 	}
 
 	/**
-	 * Get the URL for an image by ID (for use in img src)
+	 * Get the URL for an image by ID (for use in img src).
+	 * The version changes when the image content does, so the browser cache can be reused.
 	 * @param imageId - The UUID of the image
+	 * @param version - Content version, e.g. the job completion timestamp
 	 * @returns The URL string for the image
 	 */
-	getImageUrl(imageId: string): string {
-		return `${this.baseUrl}/images/${imageId}?t=${Date.now()}`;
+	getImageUrl(imageId: string, version?: string | null): string {
+		return `${this.baseUrl}/images/${imageId}?v=${encodeURIComponent(version ?? 'original')}`;
 	}
 }
@@ -24,6 +24,34 @@ export interface Image {
 	job?: Job | null;
 }
 
+/**
+ * A page of images together with the token to poll for later changes
+ */
+export interface ImageList {
+	images: Image[];
+	changeToken: string | null;
+}
+
+/**
+ * Images changed and deleted since a change token
+ */
+export interface ImageChanges {
+	token: string;
+	changed: Image[];
+	deleted: string[];
+}
+
+/**
+ * Job event pushed by the API over Server-Sent Events
+ */
+export interface JobEvent {
+	id: string;
+	job_id: string;
+	// 'pending': the job failed and the image is queued for another attempt
+	state: 'acquired' | 'pending' | 'completed' | 'failed';
+	progress?: Record<string, number>;
+}
+
 /**
  * Response from the upload service
  */